@@ -118,4 +118,28 @@ GET_CLOSEST_DATE_QUERY = text("""
 INSERT_USER_REVIEW_QUERY = text("""
     INSERT INTO user_reviews (chat_id, username, user_name, review, rating, review_type, chat_type)
     VALUES (:chat_id, :username, :user_name, :review, :rating, :review_type, :chat_type);
-""")
\ No newline at end of file
+""")
+
+# Queries for the translation memory
+CREATE_TRANSLATION_MEMORY_TABLE_QUERY = text("""
+    CREATE TABLE IF NOT EXISTS translation_memory (
+        source_hash VARCHAR NOT NULL,
+        model_name VARCHAR NOT NULL,
+        source_text TEXT NOT NULL,
+        translation TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (source_hash, model_name)
+    );
+""")
+
+SELECT_TRANSLATIONS_QUERY = text("""
+    SELECT source_hash, translation
+    FROM translation_memory
+    WHERE model_name = :model_name AND source_hash = ANY(:source_hashes);
+""")
+
+INSERT_TRANSLATION_QUERY = text("""
+    INSERT INTO translation_memory (source_hash, model_name, source_text, translation)
+    VALUES (:source_hash, :model_name, :source_text, :translation)
+    ON CONFLICT (source_hash, model_name) DO NOTHING;
+""")
@@ -29,7 +29,8 @@ from data.constants_and_mappings import (
 
 from data.database_queries import UNIQUE_JOBS_QUERY, ALL_FROM_JOBS_UPLOAD_QUERY
 
-from lang_detect_translate import detect_language, translate_title
+from lang_detect_translate import detect_language, translate_batch, translate_segments, translation_model_key
+from translation_memory import TranslationMemory
 
 warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy connectable")
 
@@ -56,8 +57,11 @@ def replace_underscores(text):
     return re.sub(r'^[▁]+|[▁]+$', '', text).replace('▁', ' ')
 
 
-def process_column(df, column_name, detect_language_func, translate_title_func):
-    """Detect and translate language in a specified column, then clean underscores."""
+def process_column(df, column_name, detect_language_func, translate_batch_func, separator=None):
+    """Detect the language of a column, translate its Polish rows in batches, then clean underscores.
+
+    With a separator the rows are bullet lists and are translated bullet by bullet.
+    """
     try:
         print(f"\nProcessing column: '{column_name}'\n")
         start_time = time.time()  
@@ -65,11 +69,15 @@ def process_column(df, column_name, detect_language_func, translate_title_func):
         tqdm.pandas(desc="Detecting language")
         df['detected_language'] = df[column_name].progress_apply(detect_language_func)
         
-        tqdm.pandas(desc="Translating and cleaning")
-        df[column_name] = df.progress_apply(
-            lambda row: translate_title_func(row[column_name]) if row['detected_language'] == 'pl' else row[column_name],
-            axis=1
-        ).apply(replace_underscores)     
+        polish_rows = df['detected_language'] == 'pl'
+        print(f"Translating {polish_rows.sum()} of {len(df)} rows")
+        if polish_rows.any():
+            texts = df.loc[polish_rows, column_name].tolist()
+            if separator is None:
+                df.loc[polish_rows, column_name] = translate_batch_func(texts, progress=True)
+            else:
+                df.loc[polish_rows, column_name] = translate_segments(texts, translate_batch_func, separator, progress=True)
+        df[column_name] = df[column_name].apply(replace_underscores)
           
         end_time = time.time()
         processing_time = end_time - start_time
@@ -363,9 +371,14 @@ if __name__ == "__main__":
 
 
     columns_to_process = ['job_title','responsibilities','requirements','benefits','offering']
+    # Columns holding ';'-joined bullets, translated bullet by bullet
+    segmented_columns = ['responsibilities','requirements','benefits','offering']
 
+    translation_memory = TranslationMemory(engine, translate_batch, translation_model_key)
     for column in columns_to_process:
-        df = process_column(df, column, detect_language, translate_title)
+        separator = ';' if column in segmented_columns else None
+        df = process_column(df, column, detect_language, translation_memory.translate, separator)
+    translation_memory.report()
 
     for column in columns_to_process:
         df[column] = df[column].apply(lambda x: replace_polish_words(str(x), TRANSLATION_DICT))
@@ -1,41 +1,131 @@
-from langdetect import detect, DetectorFactory
-from langdetect.lang_detect_exception import LangDetectException
-import re
-from transformers import MarianMTModel, MarianTokenizer
+import os
+from tqdm import tqdm
+from transformers import MarianConfig, MarianMTModel, MarianTokenizer
 import torch
 
+from language_detection import detect_language
+
 torch.cuda.empty_cache()
-DetectorFactory.seed = 0
 
 model_name = 'Helsinki-NLP/opus-mt-pl-en'
-device = 'cuda' if torch.cuda.is_available() else 'cpu'
-model = MarianMTModel.from_pretrained(model_name).to(device)
+
+# Opt-in CPU mode: int8 dynamic quantization of the model's Linear layers, cached
+# in TRANSLATION_MODEL_CACHE_DIR, and TRANSLATION_THREADS intra-op threads
+TRANSLATION_QUANTIZE = os.getenv('TRANSLATION_QUANTIZE', '').lower() in ('1', 'true', 'yes')
+TRANSLATION_THREADS = int(os.getenv('TRANSLATION_THREADS', 0))
+TRANSLATION_MODEL_CACHE_DIR = os.getenv(
+    'TRANSLATION_MODEL_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+)
+
+def quantized_model_path(name=model_name):
+    """Cache file of the quantized weights, per model and torch version as the packed format may change."""
+    file_name = f"{name.replace('/', '--')}-int8-torch{torch.__version__.split('+')[0]}.pt"
+    return os.path.join(TRANSLATION_MODEL_CACHE_DIR, file_name)
+
+def quantize(marian_model):
+    return torch.quantization.quantize_dynamic(marian_model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def load_model(quantized=False, name=model_name):
+    """Load the Marian model in fp32 on the available device, or int8-quantized on the CPU.
+
+    The quantized weights are saved on the first run. Later runs build the
+    quantized model from the config and load them, skipping the fp32
+    weights and the conversion.
+    """
+    if not quantized:
+        return MarianMTModel.from_pretrained(name).to(device).eval()
+
+    path = quantized_model_path(name)
+    if os.path.exists(path):
+        try:
+            quantized_model = quantize(MarianMTModel(MarianConfig.from_pretrained(name)).eval())
+            quantized_model.load_state_dict(torch.load(path, weights_only=False))
+            return quantized_model
+        except Exception as e:
+            print(f"Error loading quantized model from {path}, converting again: {e}")
+
+    quantized_model = quantize(MarianMTModel.from_pretrained(name).eval())
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    torch.save(quantized_model.state_dict(), path)
+    return quantized_model
+
+if TRANSLATION_THREADS > 0:
+    torch.set_num_threads(TRANSLATION_THREADS)
+
+# Quantized kernels run on the CPU only
+device = 'cuda' if torch.cuda.is_available() and not TRANSLATION_QUANTIZE else 'cpu'
+model = load_model(quantized=TRANSLATION_QUANTIZE)
 tokenizer = MarianTokenizer.from_pretrained(model_name, clean_up_tokenization_spaces=True)
+# Key of this model's translations in the translation memory; int8 output may differ from fp32
+translation_model_key = f"{model_name}:int8" if TRANSLATION_QUANTIZE else model_name
 
-def detect_language(title):
-    """Detect if the text is in Polish; otherwise, return 'en'."""
-    try:
-        if re.search(r'[ąćęłńóśźż]', title):
-            return 'pl'
-        detected_language = detect(title)
-        return detected_language if detected_language == 'pl' else 'en'
-    except LangDetectException:
-        return 'en'
-    except Exception as e:
-        print(f"Error detecting language for '{title}': {e}")
-        return 'en'
+# Texts per generate() call, and the most (padded) tokens a batch may hold so
+# batches of long section texts stay within memory
+TRANSLATION_BATCH_SIZE = int(os.getenv('TRANSLATION_BATCH_SIZE', 32))
+TRANSLATION_MAX_BATCH_TOKENS = int(os.getenv('TRANSLATION_MAX_BATCH_TOKENS', 8192))
+MAX_INPUT_TOKENS = 512
+
+def length_buckets(lengths, batch_size, max_batch_tokens):
+    """Group indices sorted by length into batches of at most batch_size texts and max_batch_tokens padded tokens."""
+    batch = []
+    for index in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Sorted ascending, so the current text sets the padded length of the batch
+        if batch and (len(batch) == batch_size or (len(batch) + 1) * lengths[index] > max_batch_tokens):
+            yield batch
+            batch = []
+        batch.append(index)
+    if batch:
+        yield batch
+
+def translate_batch(texts, batch_size=TRANSLATION_BATCH_SIZE, max_batch_tokens=TRANSLATION_MAX_BATCH_TOKENS, progress=False,
+                    translation_model=None):
+    """Translate a list of Polish texts to English, returning the translations in input order.
+
+    Texts are tokenized once and sorted by length into buckets, each padded
+    only to its own longest text, and every bucket is translated with one
+    generate() call. Texts of a batch that fails are returned untranslated.
+    translation_model defaults to the module's model.
+    """
+    translation_model = translation_model or model
+    texts = [str(text) for text in texts]
+    results = list(texts)
+    if not texts:
+        return results
+
+    input_ids = tokenizer(texts, truncation=True, max_length=MAX_INPUT_TOKENS)['input_ids']
+    batches = list(length_buckets([len(ids) for ids in input_ids], batch_size, max_batch_tokens))
+
+    with torch.inference_mode():
+        for batch in tqdm(batches, desc="Translating", disable=not progress):
+            try:
+                inputs = tokenizer.pad({'input_ids': [input_ids[i] for i in batch]}, return_tensors="pt").to(translation_model.device)
+                translated = translation_model.generate(**inputs)
+                for i, text in zip(batch, tokenizer.batch_decode(translated, skip_special_tokens=True)):
+                    results[i] = text
+            except Exception as e:
+                print(f"Error translating batch of {len(batch)} texts: {e}")
+    return results
+
+def translate_segments(texts, translate_func=translate_batch, separator=';', **kwargs):
+    """Translate separator-joined bullet lists segment by segment, returning them reassembled in input order.
+
+    Segments are deduplicated across all texts, so each distinct bullet is
+    translated once, and none is cut off by the model's input limit.
+    """
+    split_texts = [[segment.strip() for segment in str(text).split(separator)] for text in texts]
+    unique_segments = list(dict.fromkeys(segment for segments in split_texts for segment in segments if segment))
+    translations = dict(zip(unique_segments, translate_func(unique_segments, **kwargs))) if unique_segments else {}
+    return [separator.join(translations.get(segment, segment) for segment in segments) for segments in split_texts]
+
+def translate_title(title, detected_language=None):
+    """Translate a single title from Polish to English if necessary.
 
-def translate_title(title):
-    """Translate a single title from Polish to English if necessary."""
+    Pass detected_language when it is already known so it is not detected again.
+    """
     try:
-        detected_language = detect_language(title)
-        if detected_language == 'pl':
-            inputs = tokenizer(title, return_tensors="pt", padding=True, truncation=True).to(device)
-            translated = model.generate(**inputs)
-            translated_text = tokenizer.decode(translated[0], skip_special_tokens=True)
-            return translated_text
-        else:
-            return title
+        if (detected_language or detect_language(title)) == 'pl':
+            return translate_batch([title])[0]
+        return title
     except Exception as e:
         print(f"Error translating title '{title}': {e}")
         return title
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""Tiered Polish/English language detection for job ad text.
+
+1. Polish diacritics: the text is Polish.
+2. Stopwords: the text is Polish or English when one language's function
+   words clearly outnumber the other's.
+3. Only the ambiguous rest (short titles, lists of technologies) goes to
+   langdetect's statistical model, whose profiles are loaded once.
+
+Decisions are memoized per distinct string, so the bullets, titles and
+boilerplate repeated across ads are classified once per run.
+"""
+import re
+from functools import lru_cache
+from langdetect import detect, DetectorFactory
+from langdetect.lang_detect_exception import LangDetectException
+
+DetectorFactory.seed = 0
+
+POLISH_CHARACTERS_RE = re.compile(r'[ąćęłńóśźż]', re.IGNORECASE)
+WORD_RE = re.compile(r'[^\W\d_]+')
+
+# Words shared by both languages ('a', 'do', 'to', 'on', 'we', ...) are left out.
+# The one-letter words only count in lower case, so the numeral in titles like
+# "Software Engineer I" is not taken for the Polish 'i'.
+POLISH_STOPWORDS = frozenset({
+    'i', 'w', 'z', 'na', 'dla', 'oraz', 'od', 'przy', 'lub', 'ze', 'za', 'nie', 'jako', 'pod', 'nad',
+    'bez', 'przez', 'jest', 'mamy', 'lat', 'pracy', 'praca', 'umowa', 'zespole', 'zespolu', 'znajomosc',
+    'projektow', 'rozwoj', 'programista', 'specjalista', 'kierownik', 'inzynier', 'analityk',
+})
+ENGLISH_STOPWORDS = frozenset({
+    'the', 'and', 'of', 'in', 'for', 'with', 'is', 'are', 'you', 'our', 'your', 'will', 'be', 'an', 'as',
+    'at', 'by', 'from', 'or', 'experience', 'team', 'work', 'knowledge', 'years', 'skills', 'working',
+    'development', 'engineer', 'manager',
+})
+
+DETECTION_CACHE_SIZE = 200000
+
+
+def detect_language_tier(text):
+    """Return (language, tier) for a text, the tier being 'diacritics', 'stopwords', 'statistical' or 'empty'."""
+    if not isinstance(text, str) or not text.strip():
+        return 'en', 'empty'
+    if POLISH_CHARACTERS_RE.search(text):
+        return 'pl', 'diacritics'
+
+    words = WORD_RE.findall(text)
+    polish = sum(1 for word in words if (word if len(word) == 1 else word.lower()) in POLISH_STOPWORDS)
+    english = sum(1 for word in words if word.lower() in ENGLISH_STOPWORDS)
+    if polish != english:
+        return ('pl' if polish > english else 'en'), 'stopwords'
+
+    try:
+        return ('pl' if detect(text) == 'pl' else 'en'), 'statistical'
+    except LangDetectException:
+        return 'en', 'statistical'
+
+
+@lru_cache(maxsize=DETECTION_CACHE_SIZE)
+def _detect_language(text):
+    return detect_language_tier(text)[0]
+
+
+def detect_language(title):
+    """Detect if the text is in Polish; otherwise, return 'en'."""
+    if not isinstance(title, str):
+        return 'en'
+    return _detect_language(title)
+
+
+def clear_detection_cache():
+    _detect_language.cache_clear()
@@ -0,0 +1,96 @@
+"""Compare the tiered language detector with the previous langdetect path.
+
+Takes a random sample of rows from jobs_upload (or another table with the
+same text columns) and classifies every text cell twice:
+
+- langdetect: diacritics check, then langdetect on every other cell, and a
+  second detection of every Polish cell as translate_title used to do
+- tiered: language_detection.detect_language, memoized per distinct string
+
+Reports cells/sec for both, how often they agree and which tier decided
+the cells.
+
+Usage:
+    python language_detection_benchmark.py
+    python language_detection_benchmark.py --table jobs_upload_backup --rows 5000
+"""
+import os
+import re
+import json
+import time
+import argparse
+from collections import Counter
+from dotenv import load_dotenv
+from langdetect import detect
+from langdetect.lang_detect_exception import LangDetectException
+from sqlalchemy import create_engine, text
+
+from language_detection import clear_detection_cache, detect_language, detect_language_tier
+
+TEXT_COLUMNS = ['job_title', 'responsibilities', 'requirements', 'benefits', 'offering']
+
+
+def langdetect_language(title):
+    """The detector used before language_detection."""
+    try:
+        if re.search(r'[ąćęłńóśźż]', title):
+            return 'pl'
+        detected_language = detect(title)
+        return detected_language if detected_language == 'pl' else 'en'
+    except LangDetectException:
+        return 'en'
+    except Exception:
+        return 'en'
+
+
+def fetch_cells(engine, table, rows):
+    query = text(f"SELECT {', '.join(TEXT_COLUMNS)} FROM {table} ORDER BY random() LIMIT :rows")
+    with engine.connect() as connection:
+        return [cell for row in connection.execute(query, {'rows': rows}) for cell in row]
+
+
+def run_langdetect(cells):
+    started = time.perf_counter()
+    languages = []
+    for cell in cells:
+        language = langdetect_language(cell)
+        if language == 'pl':
+            langdetect_language(cell)
+        languages.append(language)
+    return languages, time.perf_counter() - started
+
+
+def run_tiered(cells):
+    clear_detection_cache()
+    started = time.perf_counter()
+    languages = [detect_language(cell) for cell in cells]
+    return languages, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark language detection on a jobs_upload sample.")
+    parser.add_argument("--table", default="jobs_upload", help="Table to sample the text columns from.")
+    parser.add_argument("--rows", type=int, default=2000, help="Number of rows to sample.")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db_config = json.loads(os.getenv("DB_CONFIG"))
+    conn_str = f"postgresql://{db_config['user']}:{db_config['password']}@{db_config['host']}/{db_config['database']}"
+    engine = create_engine(conn_str)
+
+    cells = fetch_cells(engine, args.table, args.rows)
+    if not cells:
+        raise SystemExit(f"No rows in {args.table}")
+
+    # Load langdetect's profiles before timing either path
+    langdetect_language("Load the language profiles")
+    old_languages, old_time = run_langdetect(cells)
+    new_languages, new_time = run_tiered(cells)
+    agreement = sum(1 for old, new in zip(old_languages, new_languages) if old == new) / len(cells)
+    tiers = Counter(detect_language_tier(cell)[1] for cell in set(cell for cell in cells if isinstance(cell, str)))
+
+    print(f"{len(cells)} cells ({len(set(cells))} distinct) from {args.table}")
+    print(f"langdetect: {len(cells) / old_time:10.0f} cells/s")
+    print(f"tiered:     {len(cells) / new_time:10.0f} cells/s ({old_time / new_time:.1f}x)")
+    print(f"Agreement:  {agreement:.1%}, Polish: {new_languages.count('pl')} tiered / {old_languages.count('pl')} langdetect")
+    print("Distinct cells decided by tier: " + ", ".join(f"{tier}={count}" for tier, count in tiers.most_common()))
@@ -65,7 +65,7 @@ fi
 log_message "Dependencies installed"
 
 # Run Scrapy spiders
-SPIDERS_DIR="workscrapper/workscrapper"
+SPIDERS_DIR="workscrapper"
 if [ -d "$SPIDERS_DIR" ]; then
   if ! cd "$SPIDERS_DIR"; then
     log_message "Failed to change directory to $SPIDERS_DIR"
@@ -73,18 +73,12 @@ if [ -d "$SPIDERS_DIR" ]; then
   fi
 
   log_message "Running Scrapy spiders"
-  
-  scrapy crawl pracuj_pl_spider >> "$MAIN_LOG_FILE" 2>&1 &
-  SPIDER1_PID=$!
-  
-  scrapy crawl theprotocol_spider >> "$MAIN_LOG_FILE" 2>&1 &
-  SPIDER2_PID=$!
-  
-  scrapy crawl buldogjob_spider >> "$MAIN_LOG_FILE" 2>&1 &
-  SPIDER3_PID=$!
 
-  # Wait for all spiders to complete
-  wait $SPIDER1_PID $SPIDER2_PID $SPIDER3_PID 
+  # All spiders run in one process with a shared reactor and database pool
+  if ! python3 crawl_all.py >> "$MAIN_LOG_FILE" 2>&1; then
+    log_message "Scrapy spiders failed"
+    exit 1
+  fi
 
   log_message "Scrapy spiders completed"
 else
@@ -0,0 +1,21 @@
+import pytest
+
+from language_detection import detect_language_tier
+
+
+@pytest.mark.parametrize("title", [
+    "Data Analyst I",
+    "Software Engineer I",
+    "Senior Data Engineer I",
+])
+def test_roman_numeral_is_not_polish(title):
+    assert detect_language_tier(title)[0] == 'en'
+
+
+@pytest.mark.parametrize("text", [
+    "Analityk danych i raportowania",
+    "Praca w zespole z klientami",
+    "Programista Java w zespole",
+])
+def test_lowercase_one_letter_stopwords_are_polish(text):
+    assert detect_language_tier(text) == ('pl', 'stopwords')
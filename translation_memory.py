@@ -0,0 +1,93 @@
+import re
+import hashlib
+
+from data.database_queries import (
+    CREATE_TRANSLATION_MEMORY_TABLE_QUERY, SELECT_TRANSLATIONS_QUERY, INSERT_TRANSLATION_QUERY
+)
+
+
+def normalize_source(text):
+    """Collapse whitespace so texts differing only in spacing share a translation."""
+    return re.sub(r'\s+', ' ', str(text)).strip()
+
+
+def source_hash(text):
+    return hashlib.blake2b(normalize_source(text).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class TranslationMemory:
+    """Translations stored in the translation_memory table, keyed by source hash and model.
+
+    translate() looks every text up in one query, translates only the texts
+    that are missing (each distinct text once) with translate_func and
+    writes the new translations back in one batch. When the database cannot
+    be reached every text is translated, as without the memory.
+    """
+
+    def __init__(self, engine, translate_func, model_name):
+        self.engine = engine
+        self.translate_func = translate_func
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(CREATE_TRANSLATION_MEMORY_TABLE_QUERY)
+        except Exception as e:
+            print(f"Error creating translation_memory table: {e}")
+
+    def lookup(self, hashes):
+        try:
+            with self.engine.connect() as connection:
+                rows = connection.execute(
+                    SELECT_TRANSLATIONS_QUERY,
+                    {'model_name': self.model_name, 'source_hashes': list(hashes)}
+                )
+                return {row.source_hash: row.translation for row in rows}
+        except Exception as e:
+            print(f"Error reading translation memory: {e}")
+            return {}
+
+    def store(self, translations):
+        """Save {hash: (source, translation)}; translations equal to their source are skipped as they may be failures."""
+        rows = [
+            {'source_hash': key, 'model_name': self.model_name, 'source_text': source, 'translation': translation}
+            for key, (source, translation) in translations.items()
+            if translation and translation != source
+        ]
+        if not rows:
+            return
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(INSERT_TRANSLATION_QUERY, rows)
+        except Exception as e:
+            print(f"Error writing translation memory: {e}")
+
+    def translate(self, texts, **kwargs):
+        """Translate texts through the memory, returning the translations in input order."""
+        texts = [normalize_source(text) for text in texts]
+        hashes = [source_hash(text) for text in texts]
+        known = self.lookup(set(hashes))
+
+        missing = {}
+        for key, text in zip(hashes, texts):
+            if key not in known:
+                missing.setdefault(key, text)
+        hits = sum(1 for key in hashes if key in known)
+        self.hits += hits
+        self.misses += len(texts) - hits
+        print(f"Translation memory: {hits} of {len(texts)} texts cached, {len(missing)} distinct texts to translate")
+
+        if missing:
+            translated = self.translate_func(list(missing.values()), **kwargs)
+            new = {key: (source, translation) for (key, source), translation in zip(missing.items(), translated)}
+            self.store(new)
+            known.update({key: translation for key, (_, translation) in new.items()})
+        return [known[key] for key in hashes]
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self):
+        print(f"Translation memory hit rate: {self.hit_rate():.1%} ({self.hits} of {self.hits + self.misses} texts)")
@@ -0,0 +1,74 @@
+"""Check the int8-quantized translation model against fp32 on the CPU.
+
+Translates the Polish fixture sentences in data/translation_fixtures.txt
+with both models and reports sentences/sec, the speedup, corpus BLEU of
+the int8 translations with the fp32 ones as reference and the share of
+sentences translated identically. The first run also creates the cached
+quantized model.
+
+Usage:
+    python translation_quality_check.py
+    python translation_quality_check.py --threads 4 --repeats 5 --show 5
+"""
+import time
+import argparse
+import torch
+from nltk.translate.bleu_score import SmoothingFunction, corpus_bleu
+
+from lang_detect_translate import load_model, translate_batch
+
+FIXTURES_PATH = "./data/translation_fixtures.txt"
+
+
+def read_fixtures(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def timed_translate(translation_model, sentences, repeats, batch_size):
+    """Translate the sentences repeats times and return the translations and sentences/sec."""
+    translate_batch(sentences[:batch_size], batch_size=batch_size, translation_model=translation_model)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        translations = translate_batch(sentences, batch_size=batch_size, translation_model=translation_model)
+    return translations, len(sentences) * repeats / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the int8 translation model with fp32.")
+    parser.add_argument("--fixtures", default=FIXTURES_PATH, help="File with one Polish sentence per line.")
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads, torch's default when 0.")
+    parser.add_argument("--repeats", type=int, default=3, help="Passes over the fixtures per model.")
+    parser.add_argument("--batch-size", type=int, default=32, help="Texts per generate() call.")
+    parser.add_argument("--show", type=int, default=0, help="Number of differing translations to print.")
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    sentences = read_fixtures(args.fixtures)
+
+    started = time.perf_counter()
+    fp32_model = load_model(quantized=False).to("cpu")
+    fp32_load = time.perf_counter() - started
+    started = time.perf_counter()
+    int8_model = load_model(quantized=True)
+    int8_load = time.perf_counter() - started
+
+    fp32_translations, fp32_speed = timed_translate(fp32_model, sentences, args.repeats, args.batch_size)
+    int8_translations, int8_speed = timed_translate(int8_model, sentences, args.repeats, args.batch_size)
+
+    bleu = corpus_bleu(
+        [[reference.split()] for reference in fp32_translations],
+        [hypothesis.split() for hypothesis in int8_translations],
+        smoothing_function=SmoothingFunction().method1,
+    )
+    identical = sum(1 for a, b in zip(fp32_translations, int8_translations) if a == b)
+
+    print(f"{len(sentences)} sentences, {torch.get_num_threads()} threads")
+    print(f"fp32: {fp32_speed:8.1f} sentences/s (loaded in {fp32_load:.1f}s)")
+    print(f"int8: {int8_speed:8.1f} sentences/s (loaded in {int8_load:.1f}s), {int8_speed / fp32_speed:.2f}x")
+    print(f"BLEU int8 vs fp32: {bleu * 100:.1f}, identical: {identical / len(sentences):.1%}")
+
+    differing = [(s, a, b) for s, a, b in zip(sentences, fp32_translations, int8_translations) if a != b]
+    for sentence, fp32_text, int8_text in differing[:args.show]:
+        print(f"\n{sentence}\n  fp32: {fp32_text}\n  int8: {int8_text}")
@@ -0,0 +1,87 @@
+"""Compare the precompiled extraction engine with per-call css() queries.
+
+Both sides evaluate the same spider spec on the same, already parsed, fixture
+pages. The css() side runs every selector through response.css() the way the
+spiders did before workscrapper.extraction, so each query builds Selector
+objects and compiles its XPath again. Results are checked to be identical.
+
+Usage (from the directory containing scrapy.cfg):
+    python -m benchmarks.extraction_benchmark
+    python -m benchmarks.extraction_benchmark --spiders pracuj_pl_spider --iterations 500
+"""
+import time
+import argparse
+from scrapy.spiderloader import SpiderLoader
+from scrapy.utils.project import get_project_settings
+
+from benchmarks.fixtures import available_spiders, build_response, load_fixtures
+from workscrapper.extraction import Derived, Field, Nested
+
+
+def css_extract(fields, selector):
+    """Evaluate a spec with selector.css() calls instead of the compiled XPath objects."""
+    values = {}
+    for name, field in fields.items():
+        if isinstance(field, Field):
+            matches = [match for css in field.css for match in selector.css(css).getall()]
+            value = matches if field.many else (matches[0] if matches else None)
+            if field.process is not None:
+                value = field.process(value)
+            values[name] = value if value else field.default
+        elif isinstance(field, Nested):
+            values[name] = [css_extract(field.extractor.fields, element) for element in selector.css(field.css)]
+        elif isinstance(field, Derived):
+            values[name] = field.function(values)
+    return values
+
+
+def time_runs(function, responses, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for response in responses:
+            function(response)
+    return time.perf_counter() - started
+
+
+def benchmark_spider(spider, records, iterations):
+    details = [build_response(record) for record in records if record["kind"] == "detail"]
+    listings = [build_response(record) for record in records if record["kind"] == "listing"]
+    for response in details + listings:
+        response.selector
+
+    results = {}
+    for kind, extractor, responses in (("detail", spider.detail_extractor, details),
+                                       ("listing", spider.listing_extractor, listings)):
+        for response in responses:
+            if extractor.extract(response) != css_extract(extractor.fields, response.selector):
+                raise AssertionError(f"Compiled and css() extraction differ for {response.url}")
+        compiled = time_runs(extractor.extract, responses, iterations)
+        per_call = time_runs(lambda response: css_extract(extractor.fields, response.selector), responses, iterations)
+        results[kind] = {"pages": len(responses) * iterations, "compiled": compiled, "css": per_call}
+    return results
+
+
+def print_report(spider_name, results):
+    print(f"\n{'-' * 40}")
+    print(f"{spider_name}")
+    print(f"{'-' * 40}")
+    for kind, result in results.items():
+        pages = max(result["pages"], 1)
+        speedup = result["css"] / result["compiled"] if result["compiled"] else float("inf")
+        print(f"{kind.capitalize()} pages:  {result['pages']}")
+        print(f"  css() per call:   {result['css'] / pages * 1e6:9.1f} µs/page")
+        print(f"  precompiled:      {result['compiled'] / pages * 1e6:9.1f} µs/page ({speedup:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark precompiled extraction against css() queries.")
+    parser.add_argument("--spiders", nargs="+", default=None, help="Spider names to benchmark.")
+    parser.add_argument("--iterations", type=int, default=200, help="Passes over the fixture corpus.")
+    args = parser.parse_args()
+
+    settings = get_project_settings()
+    spider_loader = SpiderLoader.from_settings(settings)
+
+    for spider_name in args.spiders or available_spiders():
+        spider = spider_loader.load(spider_name)()
+        print_report(spider_name, benchmark_spider(spider, load_fixtures(spider_name), args.iterations))
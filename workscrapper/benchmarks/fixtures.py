@@ -0,0 +1,44 @@
+"""Recorded listing and detail pages used to benchmark the spiders offline.
+
+Each site has one gzipped JSON file in benchmarks/fixtures/ named after its
+spider. The file holds a list of records with the page kind ("listing" or
+"detail"), URL, status, headers and HTML body.
+"""
+import os
+import gzip
+import json
+from scrapy import Request
+from scrapy.http import HtmlResponse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def fixture_path(spider_name):
+    return os.path.join(FIXTURES_DIR, f"{spider_name}.json.gz")
+
+
+def available_spiders():
+    return sorted(name[:-len(".json.gz")] for name in os.listdir(FIXTURES_DIR) if name.endswith(".json.gz"))
+
+
+def load_fixtures(spider_name):
+    with gzip.open(fixture_path(spider_name), "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_fixtures(spider_name, records):
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    with gzip.open(fixture_path(spider_name), "wt", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False)
+
+
+def build_response(record, response_class=HtmlResponse):
+    """Turn a fixture record into the response object the spider callbacks receive."""
+    return response_class(
+        url=record["url"],
+        status=record.get("status", 200),
+        headers=record.get("headers"),
+        body=record["body"].encode("utf-8"),
+        encoding="utf-8",
+        request=Request(record["url"]),
+    )
@@ -0,0 +1,100 @@
+"""Compare the memory and pipeline cost of JobPosting and JobsItem.
+
+The detail fixture pages of every spider are extracted once, then the
+resulting field dicts are turned into items of both classes. For each class
+the benchmark reports the time to construct an item, the memory an item
+takes (its own containers; the field strings are shared between the two
+runs) and the per-item throughput of the work the pipelines do: text
+normalization, the DuplicateItemPipeline fingerprint and the COPY row of the
+batched pipeline.
+
+Usage (from the directory containing scrapy.cfg):
+    python -m benchmarks.item_benchmark
+    python -m benchmarks.item_benchmark --items 200000
+"""
+import gc
+import time
+import argparse
+import tracemalloc
+from datetime import date
+from scrapy.spiderloader import SpiderLoader
+from scrapy.utils.project import get_project_settings
+
+from benchmarks.fixtures import available_spiders, build_response, load_fixtures
+from workscrapper.items import JobPosting, JobsItem
+from workscrapper.normalization import normalize_item
+from workscrapper.pipelines import JOBS_UPLOAD_COLUMNS, copy_value, item_fingerprint, item_values
+
+
+def fixture_fields(spider_loader, spider_names):
+    """Field dicts of every detail fixture page, as parse_job_details passes them to the item class."""
+    fields = []
+    for spider_name in spider_names:
+        spider = spider_loader.load(spider_name)()
+        for record in load_fixtures(spider_name):
+            if record["kind"] != "detail":
+                continue
+            values = spider.extract_details(build_response(record))
+            fields.append(dict(values, url=record["url"], date_posted=date.today(), upload_id=f"benchmark_{spider_name}"))
+    return fields
+
+
+def build_items(item_class, fields, count):
+    return [item_class(**fields[i % len(fields)]) for i in range(count)]
+
+
+def process(item):
+    normalize_item(item)
+    item_fingerprint(item)
+    return tuple(copy_value(value) for value in item_values(item, JOBS_UPLOAD_COLUMNS))
+
+
+def benchmark_class(item_class, fields, count):
+    gc.collect()
+    started = time.perf_counter()
+    items = build_items(item_class, fields, count)
+    construct = time.perf_counter() - started
+    del items
+
+    gc.collect()
+    tracemalloc.start()
+    items = build_items(item_class, fields, count)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for item in items:
+        process(item)
+    pipeline = time.perf_counter() - started
+
+    return {"construct": construct, "memory": memory, "pipeline": pipeline}
+
+
+def print_report(count, results):
+    print(f"\n{count} items")
+    print(f"{'':12}{'construct':>16}{'memory':>16}{'pipeline':>18}")
+    for name, result in results.items():
+        print(
+            f"{name:12}"
+            f"{result['construct'] / count * 1e6:11.2f} µs/it"
+            f"{result['memory'] / count:11.0f} B/it"
+            f"{count / result['pipeline']:13.0f} it/s"
+        )
+    baseline, slotted = results["JobsItem"], results["JobPosting"]
+    print(f"\nJobPosting memory: {slotted['memory'] / baseline['memory']:.0%} of JobsItem, "
+          f"construction {baseline['construct'] / slotted['construct']:.1f}x faster, "
+          f"pipeline {baseline['pipeline'] / slotted['pipeline']:.2f}x faster")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the slotted item class against scrapy.Item.")
+    parser.add_argument("--spiders", nargs="+", default=None, help="Spider names whose fixtures to use.")
+    parser.add_argument("--items", type=int, default=100000, help="Number of items to build per class.")
+    args = parser.parse_args()
+
+    settings = get_project_settings()
+    spider_loader = SpiderLoader.from_settings(settings)
+    fields = fixture_fields(spider_loader, args.spiders or available_spiders())
+
+    results = {item_class.__name__: benchmark_class(item_class, fields, args.items) for item_class in (JobsItem, JobPosting)}
+    print_report(args.items, results)
@@ -0,0 +1,127 @@
+"""Offline parse-throughput benchmark for the spiders.
+
+Feeds the fixture corpus through each spider's extract_job_links and
+parse_job_details as HtmlResponse objects and reports items/sec, the time
+spent building the lxml tree, the time spent in each extracted field (or
+each css()/xpath() query made directly on the response) and the peak
+memory allocated while parsing.
+
+Usage (from the directory containing scrapy.cfg):
+    python -m benchmarks.parse_benchmark
+    python -m benchmarks.parse_benchmark --spiders pracuj_pl_spider --iterations 200
+"""
+import time
+import argparse
+import tracemalloc
+from collections import defaultdict
+from scrapy.http import HtmlResponse
+from scrapy.spiderloader import SpiderLoader
+from scrapy.utils.project import get_project_settings
+
+from benchmarks.fixtures import available_spiders, build_response, load_fixtures
+
+
+class TimedResponse(HtmlResponse):
+    """HtmlResponse that records the time spent in every css() and xpath() query."""
+
+    timings = defaultdict(float)
+
+    def css(self, query):
+        started = time.perf_counter()
+        result = super().css(query)
+        self.timings[query] += time.perf_counter() - started
+        return result
+
+    def xpath(self, query, **kwargs):
+        started = time.perf_counter()
+        result = super().xpath(query, **kwargs)
+        self.timings[query] += time.perf_counter() - started
+        return result
+
+
+def parse_corpus(spider, listings, details):
+    """Run every fixture page through the spider once and return (items, links, tree build time)."""
+    tree_time = 0.0
+    items = 0
+    links = 0
+    for record in listings:
+        response = build_response(record, TimedResponse)
+        links += len(spider.extract_job_links(response))
+    for record in details:
+        response = build_response(record, TimedResponse)
+        tree_started = time.perf_counter()
+        response.selector
+        tree_time += time.perf_counter() - tree_started
+        items += sum(1 for _ in spider.parse_job_details(response))
+    return items, links, tree_time
+
+
+def benchmark_spider(spider, records, iterations):
+    listings = [record for record in records if record["kind"] == "listing"]
+    details = [record for record in records if record["kind"] == "detail"]
+
+    # Peak memory is measured on a separate pass, tracemalloc slows parsing down a lot
+    tracemalloc.start()
+    parse_corpus(spider, listings, details)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    TimedResponse.timings = defaultdict(float)
+    for extractor in (spider.listing_extractor, spider.detail_extractor):
+        if extractor is not None:
+            extractor.timings = TimedResponse.timings
+    items = links = 0
+    tree_time = 0.0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        pass_items, pass_links, pass_tree_time = parse_corpus(spider, listings, details)
+        items += pass_items
+        links += pass_links
+        tree_time += pass_tree_time
+    elapsed = time.perf_counter() - started
+    for extractor in (spider.listing_extractor, spider.detail_extractor):
+        if extractor is not None:
+            extractor.timings = None
+
+    return {
+        "items": items,
+        "links": links,
+        "elapsed": elapsed,
+        "tree_time": tree_time,
+        "peak_memory": peak,
+        "selector_timings": dict(TimedResponse.timings),
+    }
+
+
+def print_report(spider_name, result, top):
+    selector_total = sum(result["selector_timings"].values())
+    print(f"\n{'-' * 40}")
+    print(f"{spider_name}")
+    print(f"{'-' * 40}")
+    print(f"Items parsed:        {result['items']} ({result['links']} listing links)")
+    print(f"Items/sec:           {result['items'] / result['elapsed']:.1f}")
+    print(f"Total time:          {result['elapsed']:.3f}s")
+    print(f"lxml tree build:     {result['tree_time']:.3f}s")
+    print(f"Selector queries:    {selector_total:.3f}s")
+    print(f"Peak memory:         {result['peak_memory'] / 1024 / 1024:.2f} MB")
+    print("\nSlowest fields and selectors (µs per page):")
+    pages = max(result["items"], 1)
+    timings = sorted(result["selector_timings"].items(), key=lambda kv: kv[1], reverse=True)
+    for query, seconds in timings[:top]:
+        print(f"  {seconds / pages * 1e6:9.1f}  {query}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark spider parsing on recorded pages.")
+    parser.add_argument("--spiders", nargs="+", default=None, help="Spider names to benchmark.")
+    parser.add_argument("--iterations", type=int, default=50, help="Passes over the fixture corpus.")
+    parser.add_argument("--top", type=int, default=10, help="Number of selectors to list.")
+    args = parser.parse_args()
+
+    settings = get_project_settings()
+    spider_loader = SpiderLoader.from_settings(settings)
+
+    for spider_name in args.spiders or available_spiders():
+        spider = spider_loader.load(spider_name)()
+        result = benchmark_spider(spider, load_fixtures(spider_name), args.iterations)
+        print_report(spider_name, result, args.top)
@@ -0,0 +1,58 @@
+"""Record live listing and detail pages into the benchmark fixture corpus.
+
+Fetches the first listing pages of a spider and the detail pages they link
+to, and stores them compressed in benchmarks/fixtures/<spider>.json.gz.
+
+Usage (from the directory containing scrapy.cfg):
+    python -m benchmarks.record_fixtures pracuj_pl_spider --pages 1 --details 10
+"""
+import time
+import argparse
+import requests
+from scrapy.spiderloader import SpiderLoader
+from scrapy.utils.project import get_project_settings
+
+from benchmarks.fixtures import build_response, save_fixtures
+
+
+def fetch(session, url, kind):
+    response = session.get(url, timeout=30)
+    response.raise_for_status()
+    return {
+        "kind": kind,
+        "url": response.url,
+        "status": response.status_code,
+        "headers": {"Content-Type": [response.headers.get("Content-Type", "text/html; charset=utf-8")]},
+        "body": response.text,
+    }
+
+
+def record(spider_name, pages, details, delay):
+    settings = get_project_settings()
+    spider = SpiderLoader.from_settings(settings).load(spider_name)()
+
+    session = requests.Session()
+    session.headers["User-Agent"] = settings.get("USER_AGENT")
+
+    records = []
+    for page in range(1, pages + 1):
+        listing = fetch(session, spider.page_url(page), "listing")
+        records.append(listing)
+        job_links = spider.extract_job_links(build_response(listing))[:details]
+        for job_link in job_links:
+            time.sleep(delay)
+            records.append(fetch(session, job_link, "detail"))
+            print(f"Recorded {job_link}")
+    save_fixtures(spider_name, records)
+    print(f"Saved {len(records)} pages for {spider_name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record fixture pages for a spider.")
+    parser.add_argument("spider", help="Spider name, e.g. pracuj_pl_spider.")
+    parser.add_argument("--pages", type=int, default=1, help="Number of listing pages to record.")
+    parser.add_argument("--details", type=int, default=10, help="Detail pages to record per listing page.")
+    parser.add_argument("--delay", type=float, default=1.0, help="Seconds to wait between requests.")
+    args = parser.parse_args()
+
+    record(args.spider, args.pages, args.details, args.delay)
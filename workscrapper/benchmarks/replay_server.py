@@ -0,0 +1,134 @@
+"""Local HTTP server replaying the fixture pages of every portal.
+
+Pages are looked up by the Host header and the path of the original URL,
+so requests keep the URL shapes of the live sites (it.pracuj.pl/praca?pn=1,
+theprotocol.it/praca?pageNumber=1, ...). Point the spiders at it with
+``python crawl_all.py --replay http://127.0.0.1:8765``, which swaps in
+workscrapper.replay.ReplayDownloadHandler. Unknown URLs get a 404.
+
+Latency and failures can be injected to test the crawl under load: every
+response waits latency ± jitter seconds, a share of the requests is answered
+with one of the error statuses and another share has its connection closed
+without a response.
+
+Usage (from the directory containing scrapy.cfg):
+    python -m benchmarks.replay_server
+    python -m benchmarks.replay_server --latency 0.2 --jitter 0.1 --error-rate 0.05 --error-status 503 429
+"""
+import time
+import random
+import signal
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from benchmarks.fixtures import available_spiders, load_fixtures
+
+
+def url_key(url):
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    return parts.netloc.lower(), f"{path}?{parts.query}" if parts.query else path
+
+
+def load_pages(spider_names):
+    """Index the fixture records of the given spiders by (host, path)."""
+    pages = {}
+    for spider_name in spider_names:
+        for record in load_fixtures(spider_name):
+            pages[url_key(record["url"])] = record
+    return pages
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pages, latency=0.0, jitter=0.0, error_rate=0.0, error_statuses=(503,), reset_rate=0.0):
+        super().__init__(address, ReplayRequestHandler)
+        self.pages = pages
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.reset_rate = reset_rate
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    def delay(self):
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.delay())
+
+        roll = random.random()
+        if roll < server.reset_rate:
+            server.count("reset")
+            self.close_connection = True
+            return
+        if roll < server.reset_rate + server.error_rate:
+            status = random.choice(server.error_statuses)
+            server.count(status)
+            self.send_body(status, b"injected error", {"Content-Type": ["text/plain"]})
+            return
+
+        host = (self.headers.get("Host") or "").lower()
+        record = server.pages.get((host, self.path))
+        if record is None:
+            server.count(404)
+            self.send_body(404, b"not found", {"Content-Type": ["text/plain"]})
+            return
+        server.count(record.get("status", 200))
+        self.send_body(record.get("status", 200), record["body"].encode("utf-8"), record.get("headers") or {})
+
+    def send_body(self, status, body, headers):
+        self.send_response(status)
+        for name, values in headers.items():
+            if name.lower() not in ("content-length", "content-encoding", "transfer-encoding"):
+                for value in values:
+                    self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the recorded fixture pages over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on.")
+    parser.add_argument("--spiders", nargs="+", default=None, help="Spiders whose fixtures to serve.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before every response.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- seconds added to the latency.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with an error status.")
+    parser.add_argument("--error-status", type=int, nargs="+", default=[503], help="Statuses used for injected errors.")
+    parser.add_argument("--reset-rate", type=float, default=0.0, help="Share of connections closed without a response.")
+    args = parser.parse_args()
+
+    pages = load_pages(args.spiders or available_spiders())
+    server = ReplayServer(
+        (args.host, args.port), pages, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, error_statuses=args.error_status, reset_rate=args.reset_rate,
+    )
+    print(f"Serving {len(pages)} pages on http://{args.host}:{args.port}", flush=True)
+    # Stop on SIGTERM as on Ctrl-C, so the response counts are printed when run in the background
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("Responses: " + ", ".join(f"{key}={count}" for key, count in sorted(server.counts.items(), key=str)))
@@ -0,0 +1,169 @@
+"""Run all job spiders in a single process.
+
+The spiders share one Twisted reactor and one asyncpg pool, and draw their
+requests from one GLOBAL_CONCURRENT_REQUESTS budget: a request takes a token
+once its domain slot lets it go and holds it until the download finishes,
+so requests waiting out a domain's delay or concurrency limit hold none and
+a spider whose portal is slow or finished leaves its share to the others
+(see workscrapper/downloader.py). A combined stats summary is printed when
+every spider has finished, with the number of exceptions raised in each
+spider's callbacks. The script exits with status 1 only when a spider could
+not open or run, so main.sh can tell a failed crawl from one that lost a few
+malformed pages.
+
+Each spider gets a JOBDIR for the current date under CRAWL_STATE_DIR, so
+running the script again after a crash or kill resumes the day's crawl
+(see CrawlCheckpointExtension). State from earlier days is removed.
+
+With --frontier the spiders use the shared Postgres frontier instead
+(workscrapper/frontier.py), so the same command can run on several machines
+to split the crawl between them.
+
+With --replay every page is fetched from the local replay server
+(benchmarks/replay_server.py) instead of the live sites, for measuring
+crawl throughput offline. A replay writes nothing to the database and
+leaves the day's crawl state alone (see workscrapper/replay.py).
+
+Usage (from the directory containing scrapy.cfg):
+    python crawl_all.py
+    python crawl_all.py --spiders pracuj_pl_spider theprotocol_spider
+    python crawl_all.py --fresh
+    python crawl_all.py --frontier
+    python crawl_all.py --replay http://127.0.0.1:8765
+"""
+import os
+import sys
+import shutil
+import argparse
+from datetime import date
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import data_path, get_project_settings
+
+from workscrapper.replay import replay_settings
+
+SPIDERS = ["pracuj_pl_spider", "theprotocol_spider", "buldogjob_spider"]
+
+SUMMARY_STATS = [
+    ("items", "item_scraped_count"),
+    ("dropped", "item_dropped_count"),
+    ("responses", "response_received_count"),
+    ("new urls", "seen_urls/new"),
+    ("seen urls", "seen_urls/already_seen"),
+    ("rows written", "pipeline/rows_flushed"),
+    ("MB downloaded", "downloader/response_bytes"),
+    ("seconds", "elapsed_time_seconds"),
+]
+
+
+def prepare_crawl_state(settings, crawl_date, fresh=False):
+    """Return the state directory for crawl_date, removing older ones (and today's with fresh)."""
+    if not settings.get("CRAWL_STATE_DIR"):
+        return None
+    root = data_path(settings.get("CRAWL_STATE_DIR"))
+    if os.path.isdir(root):
+        for name in os.listdir(root):
+            if name != crawl_date or fresh:
+                shutil.rmtree(os.path.join(root, name))
+    return os.path.join(root, crawl_date)
+
+
+FRONTIER_SCHEDULER = "workscrapper.frontier.PostgresFrontierScheduler"
+
+
+def create_crawlers(process, spider_names, settings, state_dir=None, frontier=False, replay=None):
+    """Create one crawler per spider, all drawing on the shared global request budget."""
+    budget = settings.getint("GLOBAL_CONCURRENT_REQUESTS", settings.getint("CONCURRENT_REQUESTS"))
+
+    crawlers = []
+    for name in spider_names:
+        crawler = process.create_crawler(name)
+        crawler.settings.set("CONCURRENT_REQUESTS", budget, priority="cmdline")
+        crawler.settings.set("GLOBAL_CONCURRENCY_ENABLED", True, priority="cmdline")
+        if replay:
+            crawler.settings.setdict(replay_settings(replay), priority="cmdline")
+        elif frontier:
+            crawler.settings.set("SCHEDULER", FRONTIER_SCHEDULER, priority="cmdline")
+        elif state_dir:
+            crawler.settings.set("JOBDIR", os.path.join(state_dir, name), priority="cmdline")
+        crawlers.append(crawler)
+    return crawlers
+
+
+def exception_count(stats):
+    """Return the number of exceptions raised in the spider's callbacks."""
+    return sum(value for key, value in stats.items() if key.startswith("spider_exceptions/"))
+
+
+def crawl_failures(crawlers, open_errors):
+    """Return a description of every crawler that could not run, given {crawler: error} for those that did not start.
+
+    A callback that raises or a spider that is closed early only costs some of
+    its pages; those are reported in the summary but do not fail the crawl.
+    """
+    return [f"{crawler.spidercls.name}: failed to run ({open_errors[crawler]})" for crawler in crawlers if crawler in open_errors]
+
+
+def format_stat(key, value):
+    if value is None:
+        return "-"
+    if key == "downloader/response_bytes":
+        return f"{value / 1024 / 1024:.1f}"
+    if isinstance(value, float):
+        return f"{value:.0f}"
+    return str(value)
+
+
+def print_summary(crawlers):
+    rows = []
+    totals = {}
+    for crawler in crawlers:
+        stats = crawler.stats.get_stats()
+        row = [crawler.spidercls.name, stats.get("finish_reason", "-")]
+        for _, key in SUMMARY_STATS:
+            value = stats.get(key)
+            row.append(format_stat(key, value))
+            if isinstance(value, (int, float)) and key != "elapsed_time_seconds":
+                totals[key] = totals.get(key, 0) + value
+            elif key == "elapsed_time_seconds" and value is not None:
+                totals[key] = max(totals.get(key, 0), value)
+        exceptions = exception_count(stats)
+        row.append(str(exceptions))
+        totals["exceptions"] = totals.get("exceptions", 0) + exceptions
+        rows.append(row)
+    rows.append(["total", "-"] + [format_stat(key, totals.get(key)) for _, key in SUMMARY_STATS] + [str(totals.get("exceptions", 0))])
+
+    header = ["spider", "finish reason"] + [label for label, _ in SUMMARY_STATS] + ["exceptions"]
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+
+    print(f"\n{'-' * 40}")
+    print("Crawl summary")
+    print(f"{'-' * 40}")
+    for row in [header] + rows:
+        print("  ".join(str(cell).ljust(width) for cell, width in zip(row, widths)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run all job spiders in one process.")
+    parser.add_argument("--spiders", nargs="+", default=SPIDERS, help="Spider names to run.")
+    parser.add_argument("--fresh", action="store_true", help="Ignore today's saved crawl state and start over.")
+    parser.add_argument("--frontier", action="store_true", help="Share the crawl with other workers through Postgres.")
+    parser.add_argument("--replay", metavar="URL", default=None, help="Fetch every page from the replay server at URL.")
+    args = parser.parse_args()
+    if args.replay and (args.frontier or args.fresh):
+        parser.error("--replay keeps away from the frontier and the crawl state, it cannot be combined with --frontier or --fresh")
+
+    settings = get_project_settings()
+    state_dir = None if args.replay else prepare_crawl_state(settings, date.today().isoformat(), args.fresh)
+    process = CrawlerProcess(settings)
+    crawlers = create_crawlers(process, args.spiders, settings, state_dir, args.frontier, args.replay)
+    open_errors = {}
+    for crawler in crawlers:
+        deferred = process.crawl(crawler)
+        deferred.addErrback(lambda failure, crawler=crawler: open_errors.setdefault(crawler, failure.getErrorMessage()))
+    process.start()
+
+    print_summary(crawlers)
+    failures = crawl_failures(crawlers, open_errors)
+    if failures:
+        print("\nCrawl failed:\n  " + "\n  ".join(failures))
+        sys.exit(1)
@@ -0,0 +1,98 @@
+"""Re-parse archived job detail pages without any network access.
+
+Reads the responses stored by ResponseArchiveExtension, runs them through
+the spider's parse_job_details and writes the items to a JSON lines file,
+or appends them to jobs_upload and jobs_upload_backup with --to-db so the
+ETL can pick them up. Items get the upload_id of the crawl that archived
+the page and a date_posted derived from the day it was fetched, as during
+the original crawl. Pages archived before upload_ids were stored get one
+derived from the fetch time instead, which matches no crawl.
+
+Usage (from the directory containing scrapy.cfg):
+    python replay_archive.py pracuj_pl_spider --date 2026-10-17 --output items.jsonl
+    python replay_archive.py pracuj_pl_spider --date 2026-10-17 --to-db
+"""
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from itemadapter import ItemAdapter
+from scrapy.spiderloader import SpiderLoader
+from scrapy.utils.project import get_project_settings, data_path
+
+from workscrapper.archive import ResponseArchiveReader
+from workscrapper.db import connect
+from workscrapper.pipelines import JOBS_UPLOAD_COLUMNS, copy_rows, copy_value, ingest_tables, item_values
+
+
+def replay(spider, reader, crawl_date=None):
+    """Yield the items parse_job_details produces for every archived response of the spider."""
+    for url, status, headers, body, fetched_at, upload_id in reader.records(crawl_date, spider.name):
+        response = HtmlResponse(url=url, status=status, headers=headers, body=body, request=Request(url))
+        posted = datetime.fromisoformat(fetched_at) - timedelta(days=1)
+        for item in spider.parse_job_details(response):
+            adapter = ItemAdapter(item)
+            adapter['date_posted'] = posted.date()
+            adapter['upload_id'] = upload_id or f"{posted}_{spider.name}"
+            yield item
+
+
+def write_jsonl(items, path):
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps(ItemAdapter(item).asdict(), ensure_ascii=False, default=str) + "\n")
+            count += 1
+    return count
+
+
+def write_db(items, batch_size=500):
+    """Copy the items into jobs_upload and jobs_upload_backup in one transaction, as a 'dual' mode crawl would."""
+    connection = connect()
+    count = 0
+    try:
+        with connection.cursor() as cursor:
+            rows = []
+            for item in items:
+                rows.append(tuple(copy_value(value) for value in item_values(item, JOBS_UPLOAD_COLUMNS)))
+                if len(rows) >= batch_size:
+                    for table in ingest_tables('dual'):
+                        copy_rows(cursor, table, rows)
+                    count += len(rows)
+                    rows = []
+            if rows:
+                for table in ingest_tables('dual'):
+                    copy_rows(cursor, table, rows)
+                count += len(rows)
+        connection.commit()
+    finally:
+        connection.close()
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse archived responses again without crawling.")
+    parser.add_argument("spider", help="Spider name, e.g. pracuj_pl_spider.")
+    parser.add_argument("--date", default=None, help="Crawl date (YYYY-MM-DD) to replay, all dates by default.")
+    parser.add_argument("--archive", default=None, help="Archive directory, RESPONSE_ARCHIVE_DIR by default.")
+    parser.add_argument("--output", default=None, help="JSON lines file to write the items to.")
+    parser.add_argument("--to-db", action="store_true", help="Append the items to jobs_upload and jobs_upload_backup.")
+    args = parser.parse_args()
+
+    if not args.output and not args.to_db:
+        parser.error("choose --output and/or --to-db")
+
+    settings = get_project_settings()
+    spider = SpiderLoader.from_settings(settings).load(args.spider)()
+    reader = ResponseArchiveReader(args.archive or data_path(settings.get('RESPONSE_ARCHIVE_DIR', 'archive')))
+
+    started = time.perf_counter()
+    items = list(replay(spider, reader, args.date))
+    print(f"Parsed {len(items)} items in {time.perf_counter() - started:.2f}s")
+
+    if args.output:
+        print(f"Wrote {write_jsonl(items, args.output)} items to {args.output}")
+    if args.to_db:
+        print(f"Copied {write_db(items)} items into jobs_upload and jobs_upload_backup")
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+from scrapy import Request
+from scrapy.core.downloader import Slot
+from scrapy.http import HtmlResponse
+from scrapy.spiders import Spider
+from scrapy.utils.test import get_crawler
+
+from workscrapper import middlewares
+from workscrapper.middlewares import AdaptiveConcurrencyMiddleware
+
+SLOT_KEY = "fast.example"
+
+
+def throughput(slot, latency):
+    """Requests per second a slot can sustain: bounded by its concurrency and by its download delay."""
+    by_concurrency = slot.concurrency / latency
+    return min(by_concurrency, 1 / slot.delay) if slot.delay else by_concurrency
+
+
+def test_throughput_rises_on_a_fast_domain(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(middlewares.time, "monotonic", lambda: clock.now)
+
+    crawler = get_crawler(Spider, {
+        "DOWNLOAD_DELAY": 0.5,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 16,
+        "ADAPTIVE_CONCURRENCY_ENABLED": True,
+    })
+    spider = crawler._create_spider("fast")
+    slot = Slot(16, 0.5, False)
+    crawler.engine = SimpleNamespace(downloader=SimpleNamespace(slots={SLOT_KEY: slot}))
+    middleware = AdaptiveConcurrencyMiddleware.from_crawler(crawler)
+
+    latency = 0.05
+    request = Request(f"https://{SLOT_KEY}/offer", meta={"download_slot": SLOT_KEY, "download_latency": latency})
+    response = HtmlResponse(request.url, body=b"<html></html>", request=request)
+
+    middleware.process_response(request, response, spider)
+    start = throughput(slot, latency)
+    assert slot.concurrency < 16
+
+    # One minute of responses, ten a second
+    for _ in range(600):
+        clock.now += 0.1
+        middleware.process_response(request, response, spider)
+
+    assert slot.concurrency == 16
+    assert slot.delay < 0.5
+    assert throughput(slot, latency) > 4 * start
@@ -0,0 +1,86 @@
+import sqlite3
+import threading
+
+from benchmarks.fixtures import load_fixtures
+from replay_archive import replay
+from workscrapper.archive import ResponseArchiveReader, ResponseArchiveWriter
+from workscrapper.spiders.pracuj_pl import JobSpider
+
+CRAWL_DATE = "2026-10-17"
+
+
+def write_responses(root, spider_name, count, errors):
+    try:
+        writer = ResponseArchiveWriter(root, spider_name, crawl_date=CRAWL_DATE)
+        for number in range(count):
+            url = f"https://{spider_name}.example/offer/{number}"
+            writer.write(url, 200, {"Content-Type": ["text/html"]}, f"<html>{url}</html>".encode())
+        writer.close()
+    except Exception as e:
+        errors.append(e)
+
+
+def test_two_writers_on_one_date(tmp_path):
+    errors = []
+    threads = [
+        threading.Thread(target=write_responses, args=(str(tmp_path), spider_name, 200, errors))
+        for spider_name in ("first_spider", "second_spider")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    reader = ResponseArchiveReader(str(tmp_path))
+    assert reader.crawl_dates() == [CRAWL_DATE]
+    for spider_name in ("first_spider", "second_spider"):
+        records = list(reader.records(CRAWL_DATE, spider_name))
+        assert len(records) == 200
+        assert all(url.startswith(f"https://{spider_name}.example/") for url, *_ in records)
+        assert records[0][3] == f"<html>{records[0][0]}</html>".encode()
+    assert len(list(reader.records(CRAWL_DATE))) == 400
+    assert reader.get("https://second_spider.example/offer/7")[0] == "https://second_spider.example/offer/7"
+
+
+def test_records_survive_a_writer_that_never_closes(tmp_path):
+    writer = ResponseArchiveWriter(str(tmp_path), "crashing_spider", crawl_date=CRAWL_DATE)
+    for number in range(3):
+        writer.write(f"https://example.com/{number}", 200, {}, b"body")
+
+    records = list(ResponseArchiveReader(str(tmp_path)).records(CRAWL_DATE, "crashing_spider"))
+    assert [url for url, *_ in records] == [f"https://example.com/{number}" for number in range(3)]
+    writer.close()
+
+
+def test_replayed_items_keep_the_upload_id_of_the_archiving_crawl(tmp_path):
+    record = next(record for record in load_fixtures(JobSpider.name) if record["kind"] == "detail")
+    upload_id = "2026-10-16 02:00:00.123456_pracuj_pl_spider"
+    writer = ResponseArchiveWriter(str(tmp_path), JobSpider.name, crawl_date=CRAWL_DATE, upload_id=upload_id)
+    writer.write(record["url"], 200, record["headers"], record["body"].encode("utf-8"))
+    writer.close()
+
+    [item] = replay(JobSpider(), ResponseArchiveReader(str(tmp_path)), CRAWL_DATE)
+    assert item.upload_id == upload_id
+
+
+def test_indexes_without_upload_ids_are_still_read(tmp_path):
+    directory = tmp_path / CRAWL_DATE / "old_spider"
+    directory.mkdir(parents=True)
+    index = sqlite3.connect(directory / "index.sqlite")
+    index.execute("""
+        CREATE TABLE responses (
+            url TEXT NOT NULL, crawl_date TEXT NOT NULL, spider TEXT NOT NULL, segment TEXT NOT NULL,
+            offset INTEGER NOT NULL, length INTEGER NOT NULL, codec TEXT NOT NULL, fetched_at TEXT NOT NULL
+        )
+    """)
+    index.commit()
+    index.close()
+
+    writer = ResponseArchiveWriter(str(tmp_path), "old_spider", crawl_date=CRAWL_DATE)
+    writer.write("https://example.com/1", 200, {}, b"body")
+    writer.close()
+
+    [record] = ResponseArchiveReader(str(tmp_path)).records(CRAWL_DATE, "old_spider")
+    assert record[0] == "https://example.com/1"
+    assert record[5] is None
@@ -0,0 +1,44 @@
+import pytest
+from scrapy.exceptions import DropItem
+from scrapy.spiders import Spider
+from scrapy.utils.test import get_crawler
+
+from workscrapper import pipelines
+from workscrapper.items import JobPosting
+from workscrapper.pipelines import DuplicateItemPipeline, fingerprints_failed, fingerprints_written, item_fingerprint
+
+
+@pytest.fixture
+def dedup(monkeypatch):
+    monkeypatch.setattr(pipelines, "_known_fingerprints", None)
+    monkeypatch.setattr(pipelines, "_pending_fingerprints", set())
+    crawler = get_crawler(Spider, {"DEDUP_PERSIST": False})
+    pipeline = DuplicateItemPipeline.from_crawler(crawler)
+    spider = crawler._create_spider("pracuj_pl_spider")
+    pipeline.open_spider(spider)
+    return pipeline, spider
+
+
+def posting(url):
+    return JobPosting(job_title="Data Analyst", employer_name="Employer", url=url)
+
+
+def test_copies_are_dropped_while_the_first_is_pending_or_written(dedup):
+    pipeline, spider = dedup
+    first = pipeline.process_item(posting("https://it.pracuj.pl/1"), spider)
+    with pytest.raises(DropItem):
+        pipeline.process_item(posting("https://theprotocol.it/1"), spider)
+
+    fingerprints_written([item_fingerprint(first)])
+    assert item_fingerprint(first) in pipelines._known_fingerprints
+    with pytest.raises(DropItem):
+        pipeline.process_item(posting("https://bulldogjob.pl/1"), spider)
+
+
+def test_copies_get_through_after_a_failed_write(dedup):
+    pipeline, spider = dedup
+    first = pipeline.process_item(posting("https://it.pracuj.pl/1"), spider)
+    fingerprints_failed([item_fingerprint(first)])
+
+    assert not pipelines._known_fingerprints
+    assert pipeline.process_item(posting("https://theprotocol.it/1"), spider).url == "https://theprotocol.it/1"
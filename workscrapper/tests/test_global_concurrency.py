@@ -0,0 +1,64 @@
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.spiders import Spider
+from scrapy.utils.test import get_crawler
+from twisted.internet.defer import Deferred
+
+from workscrapper import downloader
+from workscrapper.downloader import GlobalConcurrencyDownloader
+
+
+def create_downloader(name, **settings):
+    crawler = get_crawler(Spider, {"GLOBAL_CONCURRENCY_ENABLED": True, "GLOBAL_CONCURRENT_REQUESTS": 3, **settings})
+    instance = GlobalConcurrencyDownloader(crawler)
+    instance._slot_gc_loop.stop()
+    downloads = {}
+
+    def download_request(request, spider):
+        downloads[request.url] = Deferred()
+        return downloads[request.url]
+
+    instance.handlers.download_request = download_request
+    return instance, crawler._create_spider(name), downloads
+
+
+def finish(downloads, url):
+    downloads.pop(url).callback(HtmlResponse(url, body=b""))
+
+
+def test_spiders_share_one_request_budget(monkeypatch):
+    monkeypatch.setattr(downloader, "_global_request_slots", None)
+    busy, busy_spider, busy_downloads = create_downloader("busy")
+    idle, idle_spider, idle_downloads = create_downloader("idle")
+
+    # One spider may take the whole budget when the other has nothing to download
+    for number in range(3):
+        busy._enqueue_request(Request(f"https://busy.example/{number}"), busy_spider)
+    assert len(busy_downloads) == 3
+
+    idle._enqueue_request(Request("https://idle.example/1"), idle_spider)
+    assert not idle_downloads
+
+    finish(busy_downloads, "https://busy.example/0")
+    assert list(idle_downloads) == ["https://idle.example/1"]
+
+    # A failed download gives its token back as well
+    busy_downloads.pop("https://busy.example/1").errback(IOError("reset"))
+    assert downloader._global_request_slots.tokens == 1
+
+
+def test_requests_waiting_for_their_domain_hold_no_token(monkeypatch):
+    monkeypatch.setattr(downloader, "_global_request_slots", None)
+    slow, slow_spider, slow_downloads = create_downloader(
+        "slow", DOWNLOAD_DELAY=60, RANDOMIZE_DOWNLOAD_DELAY=False
+    )
+
+    for number in range(3):
+        slow._enqueue_request(Request(f"https://slow.example/{number}"), slow_spider)
+
+    # Only the first request left its slot, the others wait out the delay without a token
+    assert len(slow_downloads) == 1
+    assert downloader._global_request_slots.tokens == 2
+
+    slot = slow.slots["slow.example"]
+    slot.latercall.cancel()
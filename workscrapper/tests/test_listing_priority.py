@@ -0,0 +1,95 @@
+from datetime import date, timedelta
+
+import pytest
+from scrapy import Request
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.utils.test import get_crawler
+
+from benchmarks.fixtures import build_response, load_fixtures
+from workscrapper.middlewares import DetailBudgetMiddleware
+from workscrapper.spiders import buldogjob, pracuj_pl, theprotocol
+from workscrapper.spiders.base import parse_posted_date
+
+TODAY = date(2026, 10, 18)
+SPIDERS = [pracuj_pl.JobSpider, theprotocol.JobSpider, buldogjob.JobSpider]
+
+
+def listing_response(spider_cls, page=1):
+    records = [record for record in load_fixtures(spider_cls.name) if record["kind"] == "listing"]
+    return build_response(records[page - 1])
+
+
+@pytest.mark.parametrize("text, posted", [
+    ("Opublikowana: 17 października 2026", date(2026, 10, 17)),
+    ("Dodano 03.09.2026", date(2026, 9, 3)),
+    ("dzisiaj", TODAY),
+    ("Wczoraj", TODAY - timedelta(days=1)),
+    ("3 dni temu", TODAY - timedelta(days=3)),
+    ("2 days ago", TODAY - timedelta(days=2)),
+    ("31.02.2026", None),
+    ("17 brumaire 2026", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_posted_date(text, posted):
+    assert parse_posted_date(text, today=TODAY) == posted
+
+
+def test_newer_postings_score_higher():
+    spider = pracuj_pl.JobSpider()
+    today = spider.detail_priority({"posted": date.today()}, page=3)
+    yesterday = spider.detail_priority({"posted": date.today() - timedelta(days=1)}, page=1)
+    undated_first_page = spider.detail_priority({}, page=1)
+    undated_second_page = spider.detail_priority({}, page=2)
+
+    assert today > yesterday
+    assert undated_first_page > undated_second_page
+
+
+@pytest.mark.parametrize("spider_cls", SPIDERS, ids=lambda spider_cls: spider_cls.name)
+def test_offer_cards_are_read_from_the_listing(spider_cls):
+    offers = spider_cls().extract_offers(listing_response(spider_cls))
+
+    assert offers
+    for offer in offers:
+        assert offer["job_title"] and offer["employer_name"]
+        if "posted" in spider_cls.listing_fields["offers"].extractor.fields:
+            assert isinstance(offer["posted"], date)
+
+
+def test_listing_pages_go_ahead_of_detail_pages_newest_first():
+    spider = get_crawler(theprotocol.JobSpider, {"LISTING_REQUEST_PRIORITY": 100})._create_spider()
+    [start] = spider.start_requests()
+    requests = list(spider.parse(listing_response(theprotocol.JobSpider)))
+    details = [request for request in requests if request.callback == spider.parse_job_details]
+    [next_page] = [request for request in requests if request.callback == spider.parse]
+
+    assert start.priority == next_page.priority == 100
+    assert all(request.priority < 100 for request in details)
+    posted = [request.meta["listing"]["posted"] for request in sorted(details, key=lambda request: -request.priority)]
+    assert posted == sorted(posted, reverse=True)
+
+
+def parse_job_details(response):
+    pass
+
+
+def test_detail_budget_skips_detail_pages_beyond_the_budget():
+    crawler = get_crawler(pracuj_pl.JobSpider, {"DETAIL_REQUEST_BUDGET": 2})
+    spider = crawler._create_spider()
+    middleware = DetailBudgetMiddleware.from_crawler(crawler)
+    details = [Request(f"https://it.pracuj.pl/{number}", callback=parse_job_details) for number in range(3)]
+
+    middleware.process_request(details[0], spider)
+    middleware.process_request(details[1], spider)
+    # Retries and listing pages do not use up the budget
+    middleware.process_request(details[1].replace(meta={"retry_times": 1}), spider)
+    middleware.process_request(Request("https://it.pracuj.pl/praca?pn=2"), spider)
+    with pytest.raises(IgnoreRequest):
+        middleware.process_request(details[2], spider)
+    assert crawler.stats.get_value("detail_budget/skipped") == 1
+
+
+def test_detail_budget_is_off_by_default():
+    with pytest.raises(NotConfigured):
+        DetailBudgetMiddleware.from_crawler(get_crawler(pracuj_pl.JobSpider))
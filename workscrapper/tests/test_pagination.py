@@ -0,0 +1,34 @@
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from workscrapper.spiders import theprotocol
+
+
+def listing_page(request, window):
+    page = request.meta["page"]
+    links = "".join(
+        f'<a data-test="list-item-offer" href="/szczegoly/praca/oferta,{page}-{number}">oferta</a>' for number in range(2)
+    )
+    pages = "".join(f'<a data-test="anchor-pageNumber" href="?pageNumber={number}">{number}</a>' for number in window)
+    body = f"<html><body><main>{links}{pages}</main></body></html>"
+    return HtmlResponse(request.url, body=body.encode("utf-8"), encoding="utf-8", request=request)
+
+
+def next_page(spider, request, window):
+    return [request for request in spider.parse(listing_page(request, window)) if request.callback == spider.parse]
+
+
+def test_page_count_follows_a_windowed_pagination():
+    spider = get_crawler(theprotocol.JobSpider)._create_spider()
+    [first] = spider.start_requests()
+
+    # Pages 1 and 2 show page numbers 1-3 only, page 3 shows 1-5
+    [second] = next_page(spider, first, range(1, 4))
+    [third] = next_page(spider, second, range(1, 4))
+    [fourth] = next_page(spider, third, range(1, 6))
+    [fifth] = next_page(spider, fourth, range(2, 4))
+
+    assert fourth.meta["page_count"] == 5
+    assert fifth.meta == {"page": 5, "page_count": 5}
+    assert next_page(spider, fifth, range(3, 6)) == []
+    assert spider.crawler.stats.get_value("pagination/stop_reason") == "last_page"
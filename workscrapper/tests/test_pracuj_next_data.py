@@ -0,0 +1,67 @@
+import json
+
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from workscrapper.spiders.pracuj_pl import JobSpider, format_expiration, offer_fields
+
+OFFER_URL = "https://www.pracuj.pl/praca/data-engineer-warszawa,oferta,1003400000"
+
+
+def offer_page(offer):
+    next_data = {"props": {"pageProps": {"dehydratedState": {"queries": [{"state": {"data": offer}}]}}}}
+    body = f"""<html><body>
+        <h1 data-test="text-positionName">Data Engineer (HTML)</h1>
+        <h2 data-test="text-employerName">Employer (HTML)</h2>
+        <script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script>
+    </body></html>"""
+    return HtmlResponse(OFFER_URL, body=body.encode("utf-8"), encoding="utf-8")
+
+
+def create_spider(**settings):
+    return get_crawler(JobSpider, settings)._create_spider()
+
+
+def test_next_data_is_off_by_default():
+    spider = create_spider()
+    fields = spider.extract_details(offer_page({"attributes": {"jobTitle": "Data Engineer (JSON)"}}))
+
+    assert fields["job_title"] == "Data Engineer (HTML)"
+    assert spider.crawler.stats.get_value("extraction/css_fallback") == 1
+
+
+def test_fields_missing_from_next_data_are_taken_from_the_html():
+    spider = create_spider(PRACUJ_NEXT_DATA_ENABLED=True)
+    fields = spider.extract_details(offer_page({"attributes": {"jobTitle": "Data Engineer (JSON)"}}))
+
+    assert fields["job_title"] == "Data Engineer (JSON)"
+    assert fields["employer_name"] == "Employer (HTML)"
+    assert fields["location"] == "N/A"
+    assert spider.crawler.stats.get_value("extraction/css_fields_filled") == 1
+
+
+def test_expiration_is_a_warsaw_date():
+    assert format_expiration("2026-11-10T23:30:00Z") == "11.11.2026"
+    assert format_expiration("2026-07-10T22:30:00+00:00") == "11.07.2026"
+    assert format_expiration("2026-11-10T12:00:00") == "10.11.2026"
+    assert format_expiration(None) is None
+
+
+def test_badge_fields_keep_every_value_like_the_badge_text():
+    # The stored pracuj values are whole badge texts, see CONTRACT_VALUES in data/constants_and_mappings.py
+    offer = {
+        'attributes': {
+            'jobTitle': 'Data Engineer',
+            'employment': {
+                'typesOfContracts': [{'name': 'umowa o pracę'}, {'name': 'kontrakt B2B'}],
+                'positionLevels': [{'name': 'specjalista (Mid / Regular)'}, {'name': 'starszy specjalista (Senior)'}],
+                'workModes': [{'name': 'praca hybrydowa'}],
+            },
+        },
+    }
+
+    fields = offer_fields(offer)
+
+    assert fields['contract_type'] == 'umowa o pracę, kontrakt B2B'
+    assert fields['experience_level'] == 'specjalista (Mid / Regular), starszy specjalista (Senior)'
+    assert fields['hybryd_full_remote'] == 'praca hybrydowa'
@@ -0,0 +1,12 @@
+from workscrapper.replay import REPLAY_HANDLER, replay_settings
+
+
+def test_replay_stays_off_the_database_and_crawl_state():
+    settings = replay_settings("http://127.0.0.1:8765")
+
+    assert settings["DOWNLOAD_HANDLERS"] == {"http": REPLAY_HANDLER, "https": REPLAY_HANDLER}
+    assert list(settings["ITEM_PIPELINES"]) == ["workscrapper.pipelines.DuplicateItemPipeline"]
+    assert settings["DEDUP_PERSIST"] is False
+    assert settings["SEEN_URL_FILTER_ENABLED"] is False
+    assert settings["CRAWL_METRICS_DB_ENABLED"] is False
+    assert settings["JOBDIR"] is None
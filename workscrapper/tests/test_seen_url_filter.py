@@ -0,0 +1,90 @@
+import sqlite3
+
+import pytest
+from scrapy import Request
+from scrapy.spiders import Spider
+from scrapy.utils.test import get_crawler
+
+from workscrapper import middlewares
+from workscrapper.middlewares import SeenUrlFilterMiddleware
+
+RESUMED_UPLOAD = "2026-10-17 02:00:00.000001_pracuj_pl_spider"
+
+
+class Cursor:
+    """sqlite3 cursor taking the psycopg2 %s placeholders the queries are written with."""
+
+    def __init__(self, connection):
+        self.cursor = connection.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cursor.close()
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def execute(self, query, params=()):
+        self.cursor.execute(query.replace("%s", "?"), params)
+
+
+class Connection:
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def cursor(self):
+        return Cursor(self.connection)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def database(monkeypatch):
+    connection = sqlite3.connect(":memory:")
+    connection.executescript("""
+        CREATE TABLE jobs_upload (url TEXT, upload_id TEXT);
+        CREATE TABLE jobs_upload_backup (url TEXT, upload_id TEXT);
+        CREATE TABLE jobs (url TEXT);
+    """)
+    monkeypatch.setattr(middlewares, "connect", lambda: Connection(connection))
+    return connection
+
+
+def parse_job_details(response):
+    pass
+
+
+def open_filter(upload_id, resumed):
+    crawler = get_crawler(Spider, {"SEEN_URL_FILTER_ENABLED": True})
+    spider = crawler._create_spider("pracuj_pl_spider")
+    spider.upload_id = upload_id
+    spider.resumed = resumed
+    middleware = SeenUrlFilterMiddleware.from_crawler(crawler)
+    middleware.spider_opened(spider)
+    return middleware, spider
+
+
+def test_resumed_dual_mode_crawl_does_not_count_its_own_rows_as_known(database):
+    # 'dual' mode put the interrupted crawl's rows into jobs_upload and jobs_upload_backup
+    database.executemany("INSERT INTO jobs_upload VALUES (?, ?)", [("https://it.pracuj.pl/new", RESUMED_UPLOAD)])
+    database.executemany("INSERT INTO jobs_upload_backup VALUES (?, ?)", [
+        ("https://it.pracuj.pl/new", RESUMED_UPLOAD),
+        ("https://it.pracuj.pl/old", "2026-10-16 02:00:00.000001_pracuj_pl_spider"),
+        ("https://it.pracuj.pl/legacy", None),
+    ])
+
+    middleware, spider = open_filter(RESUMED_UPLOAD, resumed=True)
+
+    assert "https://it.pracuj.pl/new" not in spider.seen_urls
+    assert "https://it.pracuj.pl/old" in spider.seen_urls
+    assert "https://it.pracuj.pl/legacy" in spider.seen_urls
+
+    requests = [Request(f"https://it.pracuj.pl/{name}", callback=parse_job_details) for name in ("new", "old", "next")]
+    passed = list(middleware.process_spider_output(None, requests, spider))
+    assert [request.url for request in passed] == ["https://it.pracuj.pl/next"]
+    assert spider.crawler.stats.get_value("seen_urls/already_written") == 1
+    assert spider.crawler.stats.get_value("seen_urls/already_seen") == 1
@@ -0,0 +1,197 @@
+"""Append-only archive of raw detail-page responses.
+
+Responses are stored per crawl date and spider in segment files. Each
+record is an independently compressed frame (zstd when the zstandard
+package is installed, zlib otherwise) prefixed with its length, so a
+segment can be read back record by record. A SQLite index in the same
+directory maps every URL to its segment, offset and length, and keeps the
+upload_id of the crawl that fetched it.
+
+    <root>/<crawl_date>/<spider>/<spider>-00001.seg
+    <root>/<crawl_date>/<spider>/index.sqlite
+
+Every spider has its own index, so the spiders of crawl_all.py never wait
+for each other's writes. Index rows are committed as they are written, so
+a crash loses at most the response being written.
+"""
+import os
+import json
+import zlib
+import struct
+import sqlite3
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FRAME_HEADER = struct.Struct(">I")
+
+
+def compress(data, codec):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 6)
+
+
+def decompress(data, codec):
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def open_index(directory):
+    index = sqlite3.connect(os.path.join(directory, "index.sqlite"), timeout=10)
+    index.execute("PRAGMA journal_mode=WAL")
+    index.execute("""
+        CREATE TABLE IF NOT EXISTS responses (
+            url TEXT NOT NULL,
+            crawl_date TEXT NOT NULL,
+            spider TEXT NOT NULL,
+            segment TEXT NOT NULL,
+            offset INTEGER NOT NULL,
+            length INTEGER NOT NULL,
+            codec TEXT NOT NULL,
+            fetched_at TEXT NOT NULL,
+            upload_id TEXT
+        )
+    """)
+    columns = [row[1] for row in index.execute("PRAGMA table_info(responses)")]
+    if "upload_id" not in columns:
+        # Indexes written before upload_ids were archived
+        index.execute("ALTER TABLE responses ADD COLUMN upload_id TEXT")
+    index.execute("CREATE INDEX IF NOT EXISTS responses_url ON responses (url)")
+    return index
+
+
+class ResponseArchiveWriter:
+    """Write responses of one spider into its segments of one crawl date."""
+
+    def __init__(self, root, spider_name, crawl_date=None, segment_size=64 * 1024 * 1024, upload_id=None):
+        self.crawl_date = crawl_date or datetime.today().strftime("%Y-%m-%d")
+        self.upload_id = upload_id
+        self.directory = os.path.join(root, self.crawl_date, spider_name)
+        self.spider_name = spider_name
+        self.segment_size = segment_size
+        self.codec = "zstd" if zstandard else "zlib"
+        os.makedirs(self.directory, exist_ok=True)
+        self.index = open_index(self.directory)
+        self.segment_number = self._last_segment_number()
+        self.segment = None
+        self._open_segment()
+
+    def _last_segment_number(self):
+        prefix = f"{self.spider_name}-"
+        numbers = [
+            int(name[len(prefix):-len(".seg")])
+            for name in os.listdir(self.directory)
+            if name.startswith(prefix) and name.endswith(".seg")
+        ]
+        return max(numbers, default=1)
+
+    def _open_segment(self):
+        if self.segment:
+            self.segment.close()
+        self.segment_name = f"{self.spider_name}-{self.segment_number:05d}.seg"
+        self.segment = open(os.path.join(self.directory, self.segment_name), "ab")
+
+    def write(self, url, status, headers, body):
+        """Append one response and return the number of compressed bytes written."""
+        meta = json.dumps({"url": url, "status": status, "headers": headers}).encode("utf-8")
+        frame = compress(meta + b"\n" + body, self.codec)
+
+        if self.segment.tell() and self.segment.tell() + len(frame) > self.segment_size:
+            self.segment_number += 1
+            self._open_segment()
+
+        offset = self.segment.tell()
+        self.segment.write(FRAME_HEADER.pack(len(frame)))
+        self.segment.write(frame)
+        # The frame must be on disk before the index row pointing at it
+        self.segment.flush()
+        with self.index:
+            self.index.execute(
+                "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, self.crawl_date, self.spider_name, self.segment_name, offset,
+                 len(frame), self.codec, datetime.now().isoformat(timespec="seconds"), self.upload_id)
+            )
+        return len(frame)
+
+    def close(self):
+        self.segment.close()
+        self.index.close()
+
+
+class ResponseArchiveReader:
+    """Read archived responses back without any network access."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def crawl_dates(self):
+        return sorted(name for name in os.listdir(self.root) if self.spider_directories(name))
+
+    def spider_directories(self, crawl_date, spider_name=None):
+        """Return the archive directories of crawl_date that have an index, only spider_name's if given."""
+        date_directory = os.path.join(self.root, crawl_date)
+        if not os.path.isdir(date_directory):
+            return []
+        names = [spider_name] if spider_name else sorted(os.listdir(date_directory))
+        return [
+            os.path.join(date_directory, name) for name in names
+            if os.path.exists(os.path.join(date_directory, name, "index.sqlite"))
+        ]
+
+    def records(self, crawl_date=None, spider_name=None):
+        """Yield (url, status, headers, body, fetched_at, upload_id) for every archived response.
+
+        upload_id is None for responses archived before it was stored.
+        """
+        for date in [crawl_date] if crawl_date else self.crawl_dates():
+            for directory in self.spider_directories(date, spider_name):
+                yield from self._directory_records(directory)
+
+    def _directory_records(self, directory):
+        index = open_index(directory)
+        rows = index.execute(
+            "SELECT segment, offset, length, codec, fetched_at, upload_id FROM responses ORDER BY segment, offset"
+        ).fetchall()
+        index.close()
+
+        segment_name, segment = None, None
+        for name, offset, length, codec, fetched_at, upload_id in rows:
+            if name != segment_name:
+                if segment:
+                    segment.close()
+                segment_name, segment = name, open(os.path.join(directory, name), "rb")
+            segment.seek(offset + FRAME_HEADER.size)
+            yield self._decode(segment.read(length), codec) + (fetched_at, upload_id)
+        if segment:
+            segment.close()
+
+    def get(self, url, crawl_date=None):
+        """Return the latest archived (url, status, headers, body, fetched_at, upload_id) for a URL, or None."""
+        for date in reversed([crawl_date] if crawl_date else self.crawl_dates()):
+            latest = None
+            for directory in self.spider_directories(date):
+                index = open_index(directory)
+                row = index.execute(
+                    "SELECT segment, offset, length, codec, fetched_at, upload_id FROM responses "
+                    "WHERE url = ? ORDER BY rowid DESC LIMIT 1", (url,)
+                ).fetchone()
+                index.close()
+                if row and (latest is None or row[4] >= latest[1][4]):
+                    latest = directory, row
+            if latest:
+                directory, (name, offset, length, codec, fetched_at, upload_id) = latest
+                with open(os.path.join(directory, name), "rb") as segment:
+                    segment.seek(offset + FRAME_HEADER.size)
+                    return self._decode(segment.read(length), codec) + (fetched_at, upload_id)
+        return None
+
+    @staticmethod
+    def _decode(frame, codec):
+        meta, body = decompress(frame, codec).split(b"\n", 1)
+        meta = json.loads(meta)
+        return meta["url"], meta["status"], meta["headers"], body
@@ -0,0 +1,56 @@
+"""Checkpoint file kept in a spider's JOBDIR for resumable crawls.
+
+The checkpoint records the spider's upload_id and whether the last run is
+still running, was interrupted or finished:
+
+    running      the process died without closing the spider (OOM, kill -9);
+                 Scrapy's on-disk queue and dupefilter may be incomplete
+    interrupted  the spider was closed early (SIGTERM, Ctrl-C); the on-disk
+                 queue is consistent and the crawl continues from it
+    finished     the crawl completed
+"""
+import os
+import json
+import shutil
+from datetime import datetime
+
+CHECKPOINT_FILE = 'checkpoint.json'
+
+# Files Scrapy keeps in JOBDIR for the scheduler queue and the dupefilter
+SCHEDULER_STATE = ('requests.queue', 'requests.seen')
+
+
+def checkpoint_path(jobdir):
+    return os.path.join(jobdir, CHECKPOINT_FILE)
+
+
+def read_checkpoint(jobdir):
+    """Return the checkpoint stored in jobdir, or None for a fresh crawl."""
+    if not jobdir:
+        return None
+    try:
+        with open(checkpoint_path(jobdir), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_checkpoint(jobdir, checkpoint):
+    """Atomically replace the checkpoint file."""
+    os.makedirs(jobdir, exist_ok=True)
+    checkpoint = dict(checkpoint, updated_at=datetime.now().isoformat(timespec='seconds'))
+    tmp_path = checkpoint_path(jobdir) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, checkpoint_path(jobdir))
+
+
+def discard_scheduler_state(jobdir):
+    """Remove the scheduler queue and dupefilter files so the crawl restarts from the start URLs."""
+    for name in SCHEDULER_STATE:
+        path = os.path.join(jobdir, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
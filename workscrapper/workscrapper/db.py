@@ -0,0 +1,36 @@
+import os
+import json
+import psycopg2
+from dotenv import load_dotenv
+load_dotenv()
+
+# URLs stored by earlier crawls. Rows of the crawl being run are left out: a
+# resumed crawl already backed them up in 'dual' ingest mode, and counting
+# them as known would stop its pagination on the first listing page
+KNOWN_JOB_URLS_QUERY = """
+    SELECT url FROM jobs_upload_backup WHERE upload_id IS DISTINCT FROM %s
+    UNION
+    SELECT url FROM jobs;
+"""
+
+# URLs a spider already wrote in the crawl it is resuming
+WRITTEN_JOB_URLS_QUERY = """
+    SELECT url FROM jobs_upload WHERE upload_id = %s;
+"""
+
+
+def get_db_config():
+    return json.loads(os.getenv('DB_CONFIG'))
+
+
+def connect():
+    """Open a psycopg2 connection using the DB_CONFIG environment variable."""
+    db_config = get_db_config()
+
+    return psycopg2.connect(
+        dbname=db_config['database'],
+        user=db_config['user'],
+        password=db_config['password'],
+        host=db_config['host'],
+        port=db_config.get('port', 5432)
+    )
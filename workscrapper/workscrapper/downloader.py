@@ -0,0 +1,57 @@
+"""Downloader that shares one request budget between crawlers.
+
+crawl_all.py runs every spider in one process. With GLOBAL_CONCURRENCY_ENABLED
+each request of every crawler takes one of GLOBAL_CONCURRENT_REQUESTS shared
+tokens when its download slot lets it go, that is after it has waited out the
+domain's DOWNLOAD_DELAY and per-domain concurrency limit, and gives it back
+when the download finishes. A request queued behind a slow or throttled
+domain holds no token, so a spider whose sites are slow or done leaves its
+share to the others.
+
+While a request waits for a token it still counts against its domain slot,
+so the per-domain concurrency limit is kept.
+"""
+from time import time
+
+from scrapy.core.downloader import Downloader
+from twisted.internet import defer
+
+# Tokens shared by all crawlers of the process
+_global_request_slots = None
+
+
+class GlobalConcurrencyDownloader(Downloader):
+
+    def __init__(self, crawler):
+        global _global_request_slots
+        super().__init__(crawler)
+        self.stats = crawler.stats
+        self.request_slots = None
+        if crawler.settings.getbool('GLOBAL_CONCURRENCY_ENABLED'):
+            if _global_request_slots is None:
+                budget = crawler.settings.getint('GLOBAL_CONCURRENT_REQUESTS', crawler.settings.getint('CONCURRENT_REQUESTS'))
+                _global_request_slots = defer.DeferredSemaphore(max(1, budget))
+            self.request_slots = _global_request_slots
+
+    def _download(self, slot, request, spider):
+        if self.request_slots is None:
+            return super()._download(slot, request, spider)
+
+        # Keep the domain slot taken while the request waits for a token
+        slot.transferring.add(request)
+        if not self.request_slots.tokens:
+            self.stats.inc_value('global_concurrency/waits', spider=spider)
+        download = super()._download
+
+        def start(_):
+            slot.lastseen = time()
+            return download(slot, request, spider)
+
+        def release(result):
+            self.request_slots.release()
+            return result
+
+        deferred = self.request_slots.acquire()
+        deferred.addCallback(start)
+        deferred.addBoth(release)
+        return deferred
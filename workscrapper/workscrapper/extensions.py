@@ -0,0 +1,260 @@
+# Scrapy extensions of the workscrapper project
+#
+# See documentation in:
+# https://docs.scrapy.org/en/latest/topics/extensions.html
+
+import os
+import re
+import json
+from bisect import bisect_left
+from datetime import datetime
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+from scrapy.utils.project import data_path
+
+from workscrapper.archive import ResponseArchiveWriter
+from workscrapper.checkpoint import discard_scheduler_state, read_checkpoint, write_checkpoint
+from workscrapper.db import connect
+from workscrapper.middlewares import is_job_detail_request
+
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2, 5, 10]
+
+CREATE_CRAWL_RUNS_TABLE = """
+    CREATE TABLE IF NOT EXISTS crawl_runs (
+        upload_id VARCHAR PRIMARY KEY,
+        spider VARCHAR,
+        started_at TIMESTAMP,
+        finished_at TIMESTAMP,
+        metrics JSONB
+    );
+"""
+
+UPSERT_CRAWL_RUN = """
+    INSERT INTO crawl_runs (upload_id, spider, started_at, finished_at, metrics)
+    VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (upload_id) DO UPDATE SET
+        spider = EXCLUDED.spider,
+        started_at = EXCLUDED.started_at,
+        finished_at = EXCLUDED.finished_at,
+        metrics = EXCLUDED.metrics;
+"""
+
+
+class ResponseArchiveExtension:
+    # Stores every raw job detail response in the response archive, with the
+    # spider's upload_id, so the pages can be parsed again later with
+    # replay_archive.py.
+
+    def __init__(self, stats, root, segment_size):
+        self.stats = stats
+        self.root = root
+        self.segment_size = segment_size
+        self.writer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('RESPONSE_ARCHIVE_ENABLED'):
+            raise NotConfigured
+        ext = cls(
+            crawler.stats,
+            data_path(crawler.settings.get('RESPONSE_ARCHIVE_DIR', 'archive')),
+            crawler.settings.getint('RESPONSE_ARCHIVE_SEGMENT_SIZE', 64 * 1024 * 1024),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        return ext
+
+    def spider_opened(self, spider):
+        self.writer = ResponseArchiveWriter(
+            self.root, spider.name, segment_size=self.segment_size, upload_id=spider.upload_id
+        )
+
+    def spider_closed(self, spider):
+        if self.writer:
+            self.writer.close()
+
+    def response_received(self, response, request, spider):
+        if response.status != 200 or not is_job_detail_request(request):
+            return
+        headers = {
+            key.decode('latin1'): [value.decode('latin1') for value in values]
+            for key, values in response.headers.items()
+        }
+        written = self.writer.write(response.url, response.status, headers, response.body)
+        self.stats.inc_value('response_archive/responses', spider=spider)
+        self.stats.inc_value('response_archive/bytes', len(response.body), spider=spider)
+        self.stats.inc_value('response_archive/compressed_bytes', written, spider=spider)
+
+
+class CrawlMetricsExtension:
+    # Collects crawl performance metrics for a spider and writes them at
+    # spider close, keyed by the spider's upload_id, to a JSON file in
+    # CRAWL_METRICS_DIR and, with CRAWL_METRICS_DB_ENABLED, to crawl_runs.
+
+    def __init__(self, stats, directory, db_enabled):
+        self.stats = stats
+        self.directory = directory
+        self.db_enabled = db_enabled
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_total = 0.0
+        self.started_at = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('CRAWL_METRICS_ENABLED'):
+            raise NotConfigured
+        ext = cls(
+            crawler.stats,
+            data_path(crawler.settings.get('CRAWL_METRICS_DIR', 'crawl_runs')),
+            crawler.settings.getbool('CRAWL_METRICS_DB_ENABLED'),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        return ext
+
+    def spider_opened(self, spider):
+        self.started_at = datetime.now()
+
+    def response_received(self, response, request, spider):
+        latency = request.meta.get('download_latency')
+        if latency is None:
+            return
+        self.latency_histogram[bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.latency_total += latency
+
+    def collect(self, spider, reason):
+        stats = self.stats.get_stats(spider)
+        finished_at = datetime.now()
+        elapsed = (finished_at - self.started_at).total_seconds()
+        items = stats.get('item_scraped_count', 0)
+        responses = sum(self.latency_histogram)
+        labels = [f"<={bucket}s" for bucket in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+
+        return {
+            'upload_id': getattr(spider, 'upload_id', spider.name),
+            'spider': spider.name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'finished_at': finished_at.isoformat(timespec='seconds'),
+            'finish_reason': reason,
+            'elapsed_seconds': round(elapsed, 1),
+            'items_scraped': items,
+            'items_per_second': round(items / elapsed, 3) if elapsed else None,
+            'responses': responses,
+            'bytes_downloaded': stats.get('downloader/response_bytes', 0),
+            'latency_histogram': dict(zip(labels, self.latency_histogram)),
+            'latency_avg_seconds': round(self.latency_total / responses, 3) if responses else None,
+            'parse_time_seconds': {
+                key[len('parse_time/'):]: round(value, 3)
+                for key, value in stats.items() if key.startswith('parse_time/')
+            },
+            'parse_count': {
+                key[len('parse_count/'):]: value
+                for key, value in stats.items() if key.startswith('parse_count/')
+            },
+            'pipeline_write_seconds': round(stats.get('pipeline/flush_time_total', 0.0), 3),
+            'pipeline_flushes': stats.get('pipeline/flushes', 0),
+            'rows_written': stats.get('pipeline/rows_flushed', 0),
+            'items_dropped': stats.get('item_dropped_count', 0),
+            'already_seen_urls': stats.get('seen_urls/already_seen', 0),
+            'new_urls': stats.get('seen_urls/new', 0),
+            'duplicate_items': stats.get('dedup/duplicates', 0),
+        }
+
+    def spider_closed(self, spider, reason):
+        metrics = self.collect(spider, reason)
+
+        os.makedirs(self.directory, exist_ok=True)
+        file_name = re.sub(r'[^\w.-]+', '_', metrics['upload_id']) + '.json'
+        with open(os.path.join(self.directory, file_name), 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=2)
+
+        if self.db_enabled:
+            try:
+                connection = connect()
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(CREATE_CRAWL_RUNS_TABLE)
+                        cursor.execute(UPSERT_CRAWL_RUN, (
+                            metrics['upload_id'], spider.name,
+                            metrics['started_at'], metrics['finished_at'], json.dumps(metrics)
+                        ))
+                    connection.commit()
+                finally:
+                    connection.close()
+            except Exception as e:
+                spider.logger.error(f"Error saving crawl metrics: {e}")
+
+        spider.logger.info(
+            f"Crawl metrics: {metrics['items_scraped']} items, "
+            f"{metrics['items_per_second']} items/s, {metrics['bytes_downloaded']} bytes"
+        )
+
+
+class CrawlCheckpointExtension:
+    # Makes a crawl with JOBDIR resumable. The spider's upload_id and the run
+    # status are kept in JOBDIR/checkpoint.json, refreshed every
+    # CRAWL_CHECKPOINT_INTERVAL seconds with the crawl progress.
+    #
+    # A crawl that was closed early continues from Scrapy's on-disk queue. If
+    # the process died instead, the queue and dupefilter files cannot be
+    # trusted, so they are discarded and the spider starts over from its start
+    # URLs; detail pages already written to jobs_upload are skipped by
+    # SeenUrlFilterMiddleware. spider.resumed tells pipelines and middlewares
+    # not to reset what the interrupted run stored.
+
+    def __init__(self, crawler, jobdir, interval):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.jobdir = jobdir
+        self.interval = interval
+        self.checkpoint_loop = None
+        self.checkpoint = read_checkpoint(jobdir)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        jobdir = crawler.settings.get('JOBDIR')
+        if not jobdir:
+            raise NotConfigured
+        ext = cls(crawler, jobdir, crawler.settings.getfloat('CRAWL_CHECKPOINT_INTERVAL', 60.0))
+        ext.restore(crawler.spider)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def restore(self, spider):
+        """Runs before the engine opens, so the scheduler and the pipelines see the restored state."""
+        if self.checkpoint is None:
+            self.checkpoint = {'spider': spider.name, 'upload_id': spider.upload_id, 'resumes': 0}
+            return
+
+        spider.resumed = True
+        spider.upload_id = self.checkpoint['upload_id']
+        self.checkpoint['resumes'] = self.checkpoint.get('resumes', 0) + 1
+        if self.checkpoint.get('status') == 'running':
+            discard_scheduler_state(self.jobdir)
+            spider.logger.warning("Previous run died without closing, restarting from the start URLs")
+        spider.logger.info(f"Resuming crawl {spider.upload_id} (previous run: {self.checkpoint['status']})")
+
+    def spider_opened(self, spider):
+        self.stats.set_value('checkpoint/resumes', self.checkpoint['resumes'], spider=spider)
+        self.save('running')
+        self.checkpoint_loop = task.LoopingCall(self.save, 'running')
+        self.checkpoint_loop.start(self.interval, now=False)
+
+    def spider_closed(self, spider, reason):
+        if self.checkpoint_loop and self.checkpoint_loop.running:
+            self.checkpoint_loop.stop()
+        self.save('finished' if reason == 'finished' else 'interrupted')
+
+    def save(self, status):
+        stats = self.stats.get_stats()
+        self.checkpoint.update({
+            'status': status,
+            'items_scraped': stats.get('item_scraped_count', 0),
+            'rows_written': stats.get('pipeline/rows_flushed', 0),
+            'pages': stats.get('pagination/pages', 0),
+        })
+        write_checkpoint(self.jobdir, self.checkpoint)
@@ -0,0 +1,117 @@
+"""Declarative field extraction for the spiders.
+
+A spider describes its pages as a dict of field name -> Field / Nested /
+Derived. The dict is compiled once per spider class into an Extractor:
+every CSS selector is translated with parsel's HTMLTranslator and compiled
+into an lxml XPath object. Extraction then runs the compiled expressions
+against the tree parsel already built for the response, without creating a
+Selector per query or compiling the XPath again.
+
+Fields whose name starts with '_' are intermediate values, only visible to
+Derived fields.
+"""
+import time
+from lxml import etree
+from parsel.csstranslator import HTMLTranslator
+
+_translator = HTMLTranslator()
+
+EMPTY_VALUE = 'N/A'
+
+
+def compile_css(css):
+    """Compile a CSS selector (with ::text / ::attr() support) into an lxml XPath object."""
+    return etree.XPath(_translator.css_to_xpath(css), smart_strings=False)
+
+
+class Field:
+    """Values matched by one or more CSS selectors.
+
+    With many=False the first match (or None) is used, with many=True the
+    list of matches of all selectors. The value is passed through process
+    and replaced by default when it ends up empty, like ``.get() or 'N/A'``.
+    """
+
+    def __init__(self, css, many=False, process=None, default=EMPTY_VALUE):
+        self.css = (css,) if isinstance(css, str) else tuple(css)
+        self.many = many
+        self.process = process
+        self.default = default
+        self.xpaths = [compile_css(css) for css in self.css]
+
+    def evaluate(self, node, values):
+        matches = [match for xpath in self.xpaths for match in xpath(node)]
+        value = matches if self.many else (matches[0] if matches else None)
+        if self.process is not None:
+            value = self.process(value)
+        return value if value else self.default
+
+
+class Nested:
+    """A list with the fields of every element matched by css, evaluated relative to it."""
+
+    def __init__(self, css, fields):
+        self.css = css
+        self.xpath = compile_css(css)
+        self.extractor = Extractor(fields)
+
+    def evaluate(self, node, values):
+        return [self.extractor.extract_node(element) for element in self.xpath(node)]
+
+
+class Derived:
+    """A value computed from the fields declared before it."""
+
+    def __init__(self, function):
+        self.function = function
+
+    def evaluate(self, node, values):
+        return self.function(values)
+
+
+class Extractor:
+    """A compiled extraction spec.
+
+    Set timings to a dict to accumulate the time spent on each field, the
+    parse benchmark uses it.
+    """
+
+    timings = None
+
+    def __init__(self, fields):
+        self.fields = dict(fields)
+
+    def extract(self, response):
+        """Return a dict with the value of every field for the response."""
+        return self.extract_node(response.selector.root)
+
+    def extract_node(self, node):
+        values = {}
+        for name, field in self.fields.items():
+            if self.timings is None:
+                values[name] = field.evaluate(node, values)
+                continue
+            started = time.perf_counter()
+            values[name] = field.evaluate(node, values)
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+        return values
+
+    def extract_field(self, name, response):
+        """Return the value of a single Field or Nested field."""
+        return self.fields[name].evaluate(response.selector.root, {})
+
+
+def strip(value):
+    return value.strip() if value else value
+
+
+def join_stripped(separator=';'):
+    """Processor joining stripped matches, as in ``';'.join(v.strip() for v in ...getall())``."""
+    def process(values):
+        return separator.join(value.strip() for value in values)
+    return process
+
+
+def public_values(values):
+    """Drop the intermediate ('_'-prefixed) fields."""
+    return {name: value for name, value in values.items() if not name.startswith('_')}
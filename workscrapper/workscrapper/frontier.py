@@ -0,0 +1,307 @@
+"""Crawl frontier shared through Postgres, for splitting one crawl over several workers.
+
+Every worker runs the same spider with
+
+    SCHEDULER = 'workscrapper.frontier.PostgresFrontierScheduler'
+
+(``python crawl_all.py --frontier`` sets it). Scheduled requests are stored
+in the crawl_frontier table, keyed by crawl and request fingerprint, so a
+request enqueued by any worker is only crawled once. Workers claim batches
+of pending requests with SELECT ... FOR UPDATE SKIP LOCKED; requests a worker
+claimed but never finished are handed out again after FRONTIER_CLAIM_TIMEOUT
+seconds, up to FRONTIER_MAX_ATTEMPTS times.
+
+A claimed request is finished when it leaves the downloader or a response
+is received for it. Requests a downloader middleware drops with IgnoreRequest
+(robots.txt, DETAIL_REQUEST_BUDGET) reach neither point, so FrontierMiddleware
+reports them with the request_ignored signal.
+
+Requests are stored as the JSON of Request.to_dict(), with bytes and dates
+as tagged objects, so rows are never unpickled.
+
+The first worker of a crawl registers it in crawl_frontier_crawls. Workers
+that join later are marked spider.resumed so they do not reset jobs_upload.
+"""
+import os
+import json
+import time
+import base64
+import socket
+from collections import deque
+from datetime import date, datetime
+from scrapy import signals, Request
+from scrapy.core.scheduler import BaseScheduler
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.utils.misc import load_object
+from scrapy.utils.request import request_from_dict
+
+from workscrapper.db import connect
+
+CREATE_FRONTIER_TABLES = """
+    CREATE TABLE IF NOT EXISTS crawl_frontier_crawls (
+        crawl_id VARCHAR PRIMARY KEY,
+        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS crawl_frontier (
+        id BIGSERIAL PRIMARY KEY,
+        crawl_id VARCHAR NOT NULL,
+        fingerprint VARCHAR NOT NULL,
+        priority INTEGER NOT NULL DEFAULT 0,
+        request TEXT NOT NULL,
+        status VARCHAR NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        claimed_by VARCHAR,
+        claimed_at TIMESTAMP,
+        UNIQUE (crawl_id, fingerprint)
+    );
+
+    CREATE INDEX IF NOT EXISTS crawl_frontier_claim_idx
+        ON crawl_frontier (crawl_id, status, priority DESC, id);
+"""
+
+REGISTER_CRAWL = """
+    INSERT INTO crawl_frontier_crawls (crawl_id) VALUES (%s) ON CONFLICT DO NOTHING;
+"""
+
+ENQUEUE_REQUEST = """
+    INSERT INTO crawl_frontier (crawl_id, fingerprint, priority, request)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (crawl_id, fingerprint) DO NOTHING;
+"""
+
+CLAIM_REQUESTS = """
+    UPDATE crawl_frontier
+    SET status = 'claimed', claimed_by = %(worker)s, claimed_at = now(), attempts = attempts + 1
+    WHERE id IN (
+        SELECT id FROM crawl_frontier
+        WHERE crawl_id = %(crawl_id)s
+        AND (status = 'pending' OR (status = 'claimed' AND claimed_at < now() - %(timeout)s * interval '1 second'))
+        AND attempts < %(max_attempts)s
+        ORDER BY priority DESC, id
+        LIMIT %(limit)s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, priority, request;
+"""
+
+COMPLETE_REQUESTS = """
+    UPDATE crawl_frontier SET status = 'done' WHERE id = ANY(%s) AND status <> 'done';
+"""
+
+RELEASE_REQUESTS = """
+    UPDATE crawl_frontier SET status = 'pending', claimed_by = NULL, claimed_at = NULL, attempts = attempts - 1
+    WHERE id = ANY(%s) AND status = 'claimed';
+"""
+
+# Pending work anywhere in the crawl, including requests other workers are
+# still processing, which may enqueue more
+COUNT_OPEN_REQUESTS = """
+    SELECT count(*) FROM crawl_frontier
+    WHERE crawl_id = %(crawl_id)s
+    AND attempts < %(max_attempts)s
+    AND (status = 'pending' OR (status = 'claimed' AND claimed_by <> %(worker)s
+                                AND claimed_at >= now() - %(timeout)s * interval '1 second'));
+"""
+
+
+# Sent by FrontierMiddleware for claimed requests dropped before the downloader
+request_ignored = object()
+
+
+def encode_json_value(value):
+    """json.dumps default for the bytes and dates in Request.to_dict() output."""
+    if isinstance(value, bytes):
+        return {'__bytes__': base64.b64encode(value).decode('ascii')}
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def decode_json_value(value):
+    """json.loads object_hook reversing encode_json_value."""
+    if len(value) == 1:
+        if '__bytes__' in value:
+            return base64.b64decode(value['__bytes__'])
+        if '__datetime__' in value:
+            return datetime.fromisoformat(value['__datetime__'])
+        if '__date__' in value:
+            return date.fromisoformat(value['__date__'])
+    return value
+
+
+def request_to_json(request, spider):
+    data = request.to_dict(spider=spider)
+    data['meta'].pop('frontier_id', None)
+    data['headers'] = {name.decode('latin1'): values for name, values in data['headers'].items()}
+    return json.dumps(data, default=encode_json_value)
+
+
+def request_from_json(text, spider):
+    data = json.loads(text, object_hook=decode_json_value)
+    request_cls = load_object(data['_class']) if '_class' in data else Request
+    if not (isinstance(request_cls, type) and issubclass(request_cls, Request)):
+        raise ValueError(f"{data['_class']} is not a Request class")
+    return request_from_dict(data, spider=spider)
+
+
+class PostgresFrontierScheduler(BaseScheduler):
+    """Scrapy scheduler keeping its queue and dupefilter in Postgres."""
+
+    def __init__(self, crawler, crawl_id=None, claim_batch=16, claim_timeout=600, max_attempts=3, poll_interval=1.0):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.crawl_id = crawl_id
+        self.claim_batch = claim_batch
+        self.claim_timeout = claim_timeout
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.claimed = deque()
+        self.completed = set()
+        self.open_requests = 0
+        self.last_poll = 0.0
+        self.connection = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        scheduler = cls(
+            crawler,
+            crawl_id=settings.get('FRONTIER_CRAWL_ID'),
+            claim_batch=settings.getint('FRONTIER_CLAIM_BATCH', 16),
+            claim_timeout=settings.getint('FRONTIER_CLAIM_TIMEOUT', 600),
+            max_attempts=settings.getint('FRONTIER_MAX_ATTEMPTS', 3),
+            poll_interval=settings.getfloat('FRONTIER_POLL_INTERVAL', 1.0),
+        )
+        # Responses produced by downloader middlewares never enter the downloader
+        crawler.signals.connect(scheduler.request_done, signal=signals.request_left_downloader)
+        crawler.signals.connect(scheduler.request_done, signal=signals.response_received)
+        crawler.signals.connect(scheduler.request_done, signal=request_ignored)
+        return scheduler
+
+    def open(self, spider):
+        self.spider = spider
+        self.crawl_id = self.crawl_id or f"{spider.name}:{date.today().isoformat()}"
+        self.connection = connect()
+        self.connection.autocommit = True
+        with self.connection.cursor() as cursor:
+            cursor.execute(CREATE_FRONTIER_TABLES)
+            cursor.execute(REGISTER_CRAWL, (self.crawl_id,))
+            if cursor.rowcount == 0:
+                spider.resumed = True
+                spider.logger.info(f"Joining crawl {self.crawl_id} as {self.worker}")
+            else:
+                spider.logger.info(f"Started crawl {self.crawl_id} as {self.worker}")
+
+    def close(self, reason):
+        if self.connection is None:
+            return
+        self.flush_completed()
+        if self.claimed:
+            with self.connection.cursor() as cursor:
+                cursor.execute(RELEASE_REQUESTS, ([request.meta['frontier_id'] for request in self.claimed],))
+            self.claimed.clear()
+        self.connection.close()
+
+    def has_pending_requests(self):
+        if self.claimed:
+            return True
+        self.poll()
+        return bool(self.claimed) or self.open_requests > 0
+
+    def enqueue_request(self, request):
+        fingerprint = self.crawler.request_fingerprinter.fingerprint(request).hex()
+        if request.dont_filter:
+            # Retries and other unfiltered requests get their own row
+            fingerprint = f"{fingerprint}:{time.time_ns()}"
+        data = request_to_json(request, self.spider)
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(ENQUEUE_REQUEST, (self.crawl_id, fingerprint, request.priority, data))
+            if cursor.rowcount == 0:
+                self.stats.inc_value('frontier/duplicates', spider=self.spider)
+                return False
+        self.stats.inc_value('frontier/enqueued', spider=self.spider)
+        self.last_poll = 0.0
+        return True
+
+    def next_request(self):
+        if not self.claimed:
+            self.poll()
+        if not self.claimed:
+            return None
+        return self.claimed.popleft()
+
+    def poll(self):
+        """Claim the next batch of requests, at most once per FRONTIER_POLL_INTERVAL when there are none."""
+        now = time.monotonic()
+        if now - self.last_poll < self.poll_interval:
+            return
+        self.last_poll = now
+        self.flush_completed()
+
+        params = {
+            'crawl_id': self.crawl_id, 'worker': self.worker, 'timeout': self.claim_timeout,
+            'max_attempts': self.max_attempts, 'limit': self.claim_batch,
+        }
+        with self.connection.cursor() as cursor:
+            cursor.execute(CLAIM_REQUESTS, params)
+            rows = sorted(cursor.fetchall(), key=lambda row: (-row[1], row[0]))
+            if not rows:
+                cursor.execute(COUNT_OPEN_REQUESTS, params)
+                self.open_requests = cursor.fetchone()[0]
+                return
+
+        for frontier_id, _, data in rows:
+            try:
+                request = request_from_json(data, self.spider)
+            except (ValueError, TypeError, KeyError, ImportError, NameError) as e:
+                self.spider.logger.error(f"Skipping unreadable frontier request {frontier_id}: {e}")
+                self.stats.inc_value('frontier/invalid', spider=self.spider)
+                self.completed.add(frontier_id)
+                continue
+            request.meta['frontier_id'] = frontier_id
+            self.claimed.append(request)
+        # A full batch means more may be waiting, so don't wait for the next interval
+        if len(rows) == self.claim_batch:
+            self.last_poll = 0.0
+        self.stats.inc_value('frontier/claimed', len(rows), spider=self.spider)
+
+    def request_done(self, request, spider):
+        frontier_id = request.meta.get('frontier_id')
+        if frontier_id is not None:
+            self.completed.add(frontier_id)
+            if len(self.completed) >= self.claim_batch:
+                self.flush_completed()
+
+    def flush_completed(self):
+        if not self.completed:
+            return
+        completed, self.completed = list(self.completed), set()
+        with self.connection.cursor() as cursor:
+            cursor.execute(COMPLETE_REQUESTS, (completed,))
+            self.stats.inc_value('frontier/completed', cursor.rowcount, spider=self.spider)
+
+
+class FrontierMiddleware:
+    # Finishes claimed requests that a downloader middleware dropped with
+    # IgnoreRequest in process_request, which sends no signal the scheduler
+    # could listen to. Only enabled with PostgresFrontierScheduler.
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        scheduler = load_object(crawler.settings['SCHEDULER'])
+        if not (isinstance(scheduler, type) and issubclass(scheduler, PostgresFrontierScheduler)):
+            raise NotConfigured
+        return cls(crawler)
+
+    def process_exception(self, request, exception, spider):
+        if isinstance(exception, IgnoreRequest) and 'frontier_id' in request.meta:
+            self.crawler.signals.send_catch_log(request_ignored, request=request, spider=spider)
+        return None
@@ -4,6 +4,11 @@
 # https://docs.scrapy.org/en/latest/topics/items.html
 
 import scrapy
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional, Union
+
+
 class JobsItem(scrapy.Item):
     job_title = scrapy.Field()
     employer_name = scrapy.Field()
@@ -21,3 +26,31 @@ class JobsItem(scrapy.Item):
     url = scrapy.Field()
     date_posted = scrapy.Field()
     upload_id = scrapy.Field()
+
+
+@dataclass(slots=True)
+class JobPosting:
+    """Slotted counterpart of JobsItem, the item the spiders yield.
+
+    Fields live in slots instead of a per-item dict, which makes the items
+    queued between the spiders and the batched pipelines smaller and cheaper
+    to create. Pipelines read items through itemadapter.ItemAdapter, so
+    JobsItem keeps working everywhere (see benchmarks/item_benchmark.py).
+    """
+
+    job_title: Optional[str] = None
+    employer_name: Optional[str] = None
+    location: Optional[Union[str, List[str]]] = None
+    hybryd_full_remote: Optional[str] = None
+    expiration: Optional[str] = None
+    contract_type: Optional[str] = None
+    experience_level: Optional[Union[str, List[str]]] = None
+    salary: Optional[str] = None
+    technologies: Optional[str] = None
+    responsibilities: Optional[str] = None
+    requirements: Optional[str] = None
+    offering: Optional[str] = None
+    benefits: Optional[str] = None
+    url: Optional[str] = None
+    date_posted: Optional[date] = None
+    upload_id: Optional[str] = None
@@ -3,11 +3,53 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
-from scrapy import signals
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+from urllib.parse import urlsplit
+
+from scrapy import signals, Request
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+from twisted.internet import task
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
 
+from workscrapper.db import connect, KNOWN_JOB_URLS_QUERY, WRITTEN_JOB_URLS_QUERY
+
+
+def is_job_detail_request(request):
+    return getattr(request.callback, '__name__', None) == 'parse_job_details'
+
+
+def url_key(url):
+    """Hash a job URL without its query string and fragment into a 64-bit integer."""
+    parts = urlsplit(url)
+    normalized = parts.netloc.lower() + parts.path.rstrip('/')
+    return int.from_bytes(hashlib.blake2b(normalized.encode(), digest_size=8).digest(), 'big')
+
+
+class SeenUrls:
+    """Compact set of job URLs, stored as 64-bit hashes instead of full strings."""
+
+    def __init__(self, urls=()):
+        self.keys = {url_key(url) for url in urls if url}
+
+    def __contains__(self, url):
+        return url_key(url) in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, url):
+        self.keys.add(url_key(url))
+
 
 class WorkscrapperSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -56,48 +98,403 @@ class WorkscrapperSpiderMiddleware:
         spider.logger.info("Spider opened: %s" % spider.name)
 
 
+# Spiders running in the same process (see crawl_all.py) share one connection
+# per validator cache file, so the batched writes of one never lock out another
+_validator_caches = {}
+
+
+class ValidatorCache:
+    """SQLite file of page validators, opened once per process and committed in batches."""
+
+    def __init__(self, path, expiration_days):
+        self.path = path
+        self.users = 0
+        self.pending_writes = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT,
+                body BLOB,
+                stored_at REAL
+            )
+        """)
+        if expiration_days:
+            self.db.execute(
+                "DELETE FROM validators WHERE stored_at < ?",
+                (time.time() - expiration_days * 86400,)
+            )
+        self.db.commit()
+
+    @classmethod
+    def acquire(cls, path, expiration_days):
+        cache = _validator_caches.get(path)
+        if cache is None:
+            cache = _validator_caches[path] = cls(path, expiration_days)
+        cache.users += 1
+        return cache
+
+    def release(self):
+        self.users -= 1
+        if self.users == 0:
+            self.commit()
+            self.db.close()
+            del _validator_caches[self.path]
+
+    def commit(self):
+        if self.pending_writes:
+            self.db.commit()
+            self.pending_writes = 0
+
+
 class WorkscrapperDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+    # Persistent validator cache for job detail pages. The ETag and
+    # Last-Modified headers of every detail page are stored in a local SQLite
+    # file together with the page body. On the next crawl the request is sent
+    # as a conditional GET and a 304 answer is replaced with the cached page,
+    # so unchanged offers cost neither bandwidth nor a full download.
+    #
+    # Detail pages of jobs that are already stored are dropped by
+    # SeenUrlFilterMiddleware before they are requested again, so the cache
+    # only pays off with SEEN_URL_FILTER_ENABLED off and is disabled by default.
+    #
+    # Writes are committed every HTTP_VALIDATOR_CACHE_COMMIT_BATCH stores,
+    # every HTTP_VALIDATOR_CACHE_COMMIT_INTERVAL seconds and when the spider
+    # closes. A cache error only costs the cache, the response is always
+    # passed on.
+
+    def __init__(self, stats, path, expiration_days, commit_batch=100, commit_interval=5.0):
+        self.stats = stats
+        self.cache = ValidatorCache.acquire(path, expiration_days)
+        self.db = self.cache.db
+        self.commit_batch = commit_batch
+        self.commit_interval = commit_interval
+        self.commit_loop = None
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
+        if not crawler.settings.getbool('HTTP_VALIDATOR_CACHE_ENABLED'):
+            raise NotConfigured
+        s = cls(
+            crawler.stats,
+            data_path(crawler.settings.get('HTTP_VALIDATOR_CACHE_PATH', 'validator_cache.sqlite')),
+            crawler.settings.getint('HTTP_VALIDATOR_CACHE_EXPIRATION_DAYS', 30),
+            commit_batch=crawler.settings.getint('HTTP_VALIDATOR_CACHE_COMMIT_BATCH', 100),
+            commit_interval=crawler.settings.getfloat('HTTP_VALIDATOR_CACHE_COMMIT_INTERVAL', 5.0),
+        )
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
         return s
 
     def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
-
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
+        if request.method != 'GET' or not is_job_detail_request(request) or request.meta.get('validator_cache_skip'):
+            return None
+
+        try:
+            row = self.db.execute(
+                "SELECT etag, last_modified FROM validators WHERE url = ?", (request.url,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            spider.logger.warning(f"Validator cache lookup failed for {request.url}: {e}")
+            self.stats.inc_value('validator_cache/errors', spider=spider)
+            return None
+        if row:
+            etag, last_modified = row
+            if etag:
+                request.headers.setdefault('If-None-Match', etag)
+            if last_modified:
+                request.headers.setdefault('If-Modified-Since', last_modified)
         return None
 
     def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
+        if request.method != 'GET' or not is_job_detail_request(request):
+            return response
+
+        if response.status == 304:
+            try:
+                row = self.db.execute(
+                    "SELECT headers, body FROM validators WHERE url = ?", (request.url,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                spider.logger.warning(f"Validator cache lookup failed for {request.url}: {e}")
+                self.stats.inc_value('validator_cache/errors', spider=spider)
+                row = None
+            if row is None:
+                # Validators came from somewhere else, fetch the page unconditionally
+                self.stats.inc_value('validator_cache/miss', spider=spider)
+                retry = request.replace(dont_filter=True)
+                retry.headers.pop('If-None-Match', None)
+                retry.headers.pop('If-Modified-Since', None)
+                retry.meta['validator_cache_skip'] = True
+                return retry
+
+            headers = Headers(json.loads(row[0]))
+            body = zlib.decompress(row[1])
+            self.stats.inc_value('validator_cache/hit', spider=spider)
+            self.stats.inc_value('validator_cache/bytes_saved', len(body), spider=spider)
+            respcls = responsetypes.from_args(headers=headers, url=request.url, body=body)
+            return respcls(url=request.url, status=200, headers=headers, body=body, request=request, flags=['cached'])
+
+        if response.status == 200:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.store(request.url, etag, last_modified, response, spider)
 
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
         return response
 
-    def process_exception(self, request, exception, spider):
-        # Called when a download handler or a process_request()
-        # (from other downloader middleware) raises an exception.
+    def store(self, url, etag, last_modified, response, spider):
+        headers = {
+            key.decode('latin1'): [value.decode('latin1') for value in values]
+            for key, values in response.headers.items()
+            if key.lower() not in (b'content-encoding', b'content-length', b'set-cookie')
+        }
+        try:
+            self.db.execute(
+                "INSERT OR REPLACE INTO validators VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    etag.decode('latin1') if etag else None,
+                    last_modified.decode('latin1') if last_modified else None,
+                    json.dumps(headers),
+                    zlib.compress(response.body),
+                    time.time(),
+                )
+            )
+            self.cache.pending_writes += 1
+            if self.cache.pending_writes >= self.commit_batch:
+                self.cache.commit()
+        except sqlite3.Error as e:
+            spider.logger.warning(f"Error storing validators for {url}: {e}")
+            self.stats.inc_value('validator_cache/errors', spider=spider)
+            return
+        self.stats.inc_value('validator_cache/stored', spider=spider)
 
-        # Must either:
-        # - return None: continue processing this exception
-        # - return a Response object: stops process_exception() chain
-        # - return a Request object: stops process_exception() chain
-        pass
+    def spider_opened(self, spider):
+        self.commit_loop = task.LoopingCall(self.commit, spider)
+        self.commit_loop.start(self.commit_interval, now=False)
+
+    def commit(self, spider):
+        try:
+            self.cache.commit()
+        except sqlite3.Error as e:
+            spider.logger.warning(f"Error committing the validator cache: {e}")
+            self.stats.inc_value('validator_cache/errors', spider=spider)
+
+    def spider_closed(self, spider):
+        if self.commit_loop and self.commit_loop.running:
+            self.commit_loop.stop()
+        try:
+            self.cache.release()
+        except sqlite3.Error as e:
+            spider.logger.warning(f"Error closing the validator cache: {e}")
+
+
+class SeenUrlFilterMiddleware:
+    # Drops requests for job detail pages whose URL is already stored in
+    # jobs_upload_backup or jobs by an earlier crawl, before they reach the
+    # scheduler. When the spider resumes an interrupted crawl, the pages that
+    # crawl already wrote to jobs_upload are dropped too. Those are kept out
+    # of spider.seen_urls, even when they are in jobs_upload_backup already,
+    # so they do not stop the pagination early.
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.seen_urls = SeenUrls()
+        self.written_urls = SeenUrls()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('SEEN_URL_FILTER_ENABLED'):
+            raise NotConfigured
+        s = cls(crawler.stats)
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        return s
 
     def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+        try:
+            connection = connect()
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(KNOWN_JOB_URLS_QUERY, (spider.upload_id,))
+                    self.seen_urls = SeenUrls(url for (url,) in cursor)
+                    if getattr(spider, 'resumed', False):
+                        cursor.execute(WRITTEN_JOB_URLS_QUERY, (spider.upload_id,))
+                        self.written_urls = SeenUrls(url for (url,) in cursor)
+            finally:
+                connection.close()
+        except Exception as e:
+            spider.logger.error(f"Error loading known job URLs, crawling all of them: {e}")
+
+        spider.seen_urls = self.seen_urls
+        spider.logger.info("Loaded %d known job URLs" % len(self.seen_urls))
+        if self.written_urls:
+            spider.logger.info("Skipping %d job URLs written before the crawl was interrupted" % len(self.written_urls))
+
+    def process_spider_output(self, response, result, spider):
+        for i in result:
+            if isinstance(i, Request) and is_job_detail_request(i):
+                if i.url in self.seen_urls:
+                    self.stats.inc_value('seen_urls/already_seen', spider=spider)
+                    continue
+                if i.url in self.written_urls:
+                    self.stats.inc_value('seen_urls/already_written', spider=spider)
+                    continue
+                self.seen_urls.add(i.url)
+                self.stats.inc_value('seen_urls/new', spider=spider)
+            yield i
+
+
+class AdaptiveConcurrencyMiddleware:
+    # Tunes the concurrency and delay of every download slot (one per domain)
+    # towards a target latency. Latency and error rate are tracked as EWMAs:
+    # while the domain answers faster than the target and without errors it
+    # gets one more slot per adjustment interval and its delay is halved, when
+    # it slows down it loses one slot, and a 429 or 5xx halves its slots and
+    # doubles its delay at once. Domains start at ADAPTIVE_CONCURRENCY_START
+    # slots (half of CONCURRENT_REQUESTS_PER_DOMAIN by default) so there is
+    # room to grow, and the delay can drop below DOWNLOAD_DELAY down to
+    # ADAPTIVE_CONCURRENCY_MIN_DELAY.
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.target_latency = settings.getfloat('ADAPTIVE_CONCURRENCY_TARGET_LATENCY', 1.0)
+        self.min_concurrency = settings.getint('ADAPTIVE_CONCURRENCY_MIN', 1)
+        self.max_concurrency = settings.getint('ADAPTIVE_CONCURRENCY_MAX', 16)
+        self.start_concurrency = settings.getint(
+            'ADAPTIVE_CONCURRENCY_START', settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN') // 2
+        )
+        self.min_delay = settings.getfloat('ADAPTIVE_CONCURRENCY_MIN_DELAY', 0.0)
+        self.max_delay = settings.getfloat('ADAPTIVE_CONCURRENCY_MAX_DELAY', 10.0)
+        self.max_error_rate = settings.getfloat('ADAPTIVE_CONCURRENCY_MAX_ERROR_RATE', 0.05)
+        self.alpha = settings.getfloat('ADAPTIVE_CONCURRENCY_EWMA_ALPHA', 0.2)
+        self.interval = settings.getfloat('ADAPTIVE_CONCURRENCY_INTERVAL', 5.0)
+        self.domains = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('ADAPTIVE_CONCURRENCY_ENABLED'):
+            raise NotConfigured
+        return cls(crawler)
+
+    def process_response(self, request, response, spider):
+        error = response.status == 429 or response.status >= 500
+        self.observe(request, spider, request.meta.get('download_latency'), error, response)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        self.observe(request, spider, None, True)
+        return None
+
+    def observe(self, request, spider, latency, error, response=None):
+        key = request.meta.get('download_slot')
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if slot is None:
+            return
+
+        state = self.domains.get(key)
+        if state is None:
+            state = self.domains[key] = {
+                'concurrency': min(max(self.start_concurrency, self.min_concurrency), self.max_concurrency),
+                'delay': slot.delay,
+                'latency': latency or self.target_latency,
+                'error_rate': 0.0,
+                'adjusted_at': time.monotonic(),
+                'backoff_at': 0.0,
+            }
+
+        if latency is not None:
+            state['latency'] += self.alpha * (latency - state['latency'])
+        state['error_rate'] += self.alpha * ((1.0 if error else 0.0) - state['error_rate'])
+
+        now = time.monotonic()
+        if error and response is not None and now - state['backoff_at'] >= state['latency']:
+            # The server is pushing back: halve the slots and double the delay right away.
+            # Responses to requests sent before the previous back-off don't count again.
+            state['concurrency'] = max(self.min_concurrency, state['concurrency'] // 2)
+            retry_after = response.headers.get('Retry-After', b'').decode('latin1')
+            delay = max(state['delay'] * 2, self.min_delay or 0.5)
+            if retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            state['delay'] = min(self.max_delay, delay)
+            state['adjusted_at'] = state['backoff_at'] = now
+            self.stats.inc_value('adaptive_concurrency/backoffs', spider=spider)
+        elif now - state['adjusted_at'] >= self.interval:
+            if state['error_rate'] <= self.max_error_rate and state['latency'] < self.target_latency * 0.8:
+                state['concurrency'] = min(self.max_concurrency, state['concurrency'] + 1)
+                state['delay'] = max(self.min_delay, state['delay'] / 2)
+            elif state['latency'] > self.target_latency * 1.2 or state['error_rate'] > self.max_error_rate:
+                state['concurrency'] = max(self.min_concurrency, state['concurrency'] - 1)
+            state['adjusted_at'] = now
+
+        # The downloader may have dropped and recreated an idle slot, so always reapply
+        slot.concurrency = state['concurrency']
+        slot.delay = state['delay']
+
+        domain = urlsplit(request.url).hostname or key
+        self.stats.set_value(f'adaptive_concurrency/{domain}/concurrency', state['concurrency'], spider=spider)
+        self.stats.set_value(f'adaptive_concurrency/{domain}/delay', round(state['delay'], 3), spider=spider)
+        self.stats.set_value(f'adaptive_concurrency/{domain}/latency_ewma', round(state['latency'], 3), spider=spider)
+        self.stats.set_value(f'adaptive_concurrency/{domain}/error_rate_ewma', round(state['error_rate'], 3), spider=spider)
+
+
+class ParseTimingMiddleware:
+    # Measures the time spent inside spider callbacks. Callbacks are
+    # generators, so the time is taken while their output is consumed.
+    # Installed closest to the spider so other middlewares are not counted.
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats)
+
+    def process_spider_output(self, response, result, spider):
+        callback = getattr(response.request.callback, '__name__', None) or 'parse'
+        elapsed = 0.0
+        started = time.perf_counter()
+        for i in result:
+            elapsed += time.perf_counter() - started
+            yield i
+            started = time.perf_counter()
+        elapsed += time.perf_counter() - started
+        self.stats.inc_value(f'parse_time/{callback}', elapsed, spider=spider)
+        self.stats.inc_value(f'parse_count/{callback}', spider=spider)
+
+
+class DetailBudgetMiddleware:
+    # Stops downloading job detail pages once DETAIL_REQUEST_BUDGET of them
+    # were sent. The scheduler hands out the highest priorities first, so the
+    # pages left over are the lowest scored ones (the oldest postings, see
+    # JobListingSpider.detail_priority). Retries of a page that was already
+    # let through do not count again.
+
+    def __init__(self, stats, budget):
+        self.stats = stats
+        self.budget = budget
+        self.sent = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        budget = crawler.settings.getint('DETAIL_REQUEST_BUDGET', 0)
+        if budget <= 0:
+            raise NotConfigured
+        return cls(crawler.stats, budget)
+
+    def process_request(self, request, spider):
+        if not is_job_detail_request(request) or request.meta.get('retry_times'):
+            return None
+        if self.sent >= self.budget:
+            self.stats.inc_value('detail_budget/skipped', spider=spider)
+            raise IgnoreRequest(f"Detail request budget of {self.budget} spent")
+        self.sent += 1
+        return None
+
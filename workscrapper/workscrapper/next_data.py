@@ -0,0 +1,41 @@
+"""Reading the JSON state that Next.js pages embed in ``<script id="__NEXT_DATA__">``.
+
+The blob is cut out of the raw response body with a regular expression, so
+no HTML tree has to be built for pages that carry it. orjson is used to
+decode it when installed, the standard json module otherwise.
+"""
+import re
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+NEXT_DATA_RE = re.compile(rb'<script[^>]*\bid="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL)
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def extract_next_data(body):
+    """Return the decoded __NEXT_DATA__ blob of a page body, or None if it has none."""
+    match = NEXT_DATA_RE.search(body)
+    if match is None:
+        return None
+    try:
+        return loads(match.group(1))
+    except ValueError:
+        return None
+
+
+def dehydrated_queries(next_data):
+    """Yield the data of every react-query result the page was rendered with."""
+    page_props = (next_data or {}).get('props', {}).get('pageProps', {})
+    for query in page_props.get('dehydratedState', {}).get('queries', []):
+        data = query.get('state', {}).get('data')
+        if data is not None:
+            yield data
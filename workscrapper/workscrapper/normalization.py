@@ -0,0 +1,97 @@
+"""Text normalization applied to JobsItem fields before they leave the spider.
+
+Section fields (responsibilities, requirements, ...) are built by joining
+every text node with ';', which leaves empty fragments, stray whitespace and
+repeated bullets behind. Normalizing them at crawl time shrinks what is
+stored, backed up and later translated.
+"""
+
+import re
+from itemadapter import ItemAdapter
+
+from workscrapper.extraction import EMPTY_VALUE
+
+# Fields holding ';'-joined fragments
+FRAGMENT_FIELDS = ('technologies', 'responsibilities', 'requirements', 'offering', 'benefits')
+
+# Single-value text fields
+TEXT_FIELDS = (
+    'job_title', 'employer_name', 'location', 'hybryd_full_remote', 'expiration',
+    'contract_type', 'experience_level', 'salary'
+)
+
+DEFAULT_MAX_LENGTH = 4000
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def collapse_whitespace(text):
+    return WHITESPACE_RE.sub(' ', text).strip()
+
+
+def normalize_text(value, max_length=DEFAULT_MAX_LENGTH):
+    """Collapse whitespace in a string, or in every string of a list."""
+    if isinstance(value, list):
+        values = [collapse_whitespace(v)[:max_length] for v in value if v and v.strip()]
+        return values or EMPTY_VALUE
+    if not isinstance(value, str):
+        return value
+    return collapse_whitespace(value)[:max_length] or EMPTY_VALUE
+
+
+def normalize_fragments(value, max_length=DEFAULT_MAX_LENGTH, separator=';'):
+    """Clean a separator-joined field.
+
+    Fragments are whitespace-collapsed, empty and punctuation-only fragments
+    are dropped and repeated ones are kept once. The result is cut at a
+    fragment boundary so it is no longer than max_length.
+    """
+    if not isinstance(value, str):
+        return value
+
+    fragments = []
+    seen = set()
+    length = 0
+    for fragment in value.split(separator):
+        fragment = collapse_whitespace(fragment)
+        if not any(char.isalnum() for char in fragment):
+            continue
+        key = fragment.casefold()
+        if key in seen:
+            continue
+        seen.add(key)
+
+        added = len(fragment) + (len(separator) if fragments else 0)
+        if length + added > max_length:
+            if not fragments:
+                fragments.append(fragment[:max_length])
+            break
+        fragments.append(fragment)
+        length += added
+
+    return separator.join(fragments) or EMPTY_VALUE
+
+
+def payload_size(item):
+    """UTF-8 size in bytes of the item's text fields."""
+    if not isinstance(item, ItemAdapter):
+        item = ItemAdapter(item)
+    size = 0
+    for field in TEXT_FIELDS + FRAGMENT_FIELDS:
+        value = item.get(field)
+        values = value if isinstance(value, list) else [value]
+        size += sum(len(v.encode('utf-8')) for v in values if isinstance(v, str))
+    return size
+
+
+def normalize_item(item, max_length=DEFAULT_MAX_LENGTH):
+    """Normalize the item in place and return the number of bytes saved."""
+    item = ItemAdapter(item)
+    size_before = payload_size(item)
+    for field in TEXT_FIELDS:
+        if field in item:
+            item[field] = normalize_text(item[field], max_length)
+    for field in FRAGMENT_FIELDS:
+        if field in item:
+            item[field] = normalize_fragments(item[field], max_length)
+    return size_before - payload_size(item)
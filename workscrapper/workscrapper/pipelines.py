@@ -1,75 +1,243 @@
-import psycopg2
-import os
-import json
-from dotenv import load_dotenv
-load_dotenv()
+import asyncpg
+import asyncio
+import io
+import time
+import datetime
+import hashlib
+from psycopg2.extras import execute_values
+from itemadapter import ItemAdapter
+from twisted.internet import task
+from scrapy.exceptions import DropItem
+from scrapy.utils.defer import deferred_from_coro
+from workscrapper.db import connect, get_db_config
+from workscrapper.items import JobPosting
+
+JOBS_UPLOAD_COLUMNS = (
+    'job_title', 'employer_name', 'location', 'hybryd_full_remote', 'expiration', 'contract_type',
+    'experience_level', 'salary', 'technologies', 'responsibilities', 'requirements',
+    'offering', 'benefits', 'url', 'date_posted', 'upload_id'
+)
+
+DROP_JOBS_UPLOAD_TABLE = """
+    DROP TABLE IF EXISTS jobs_upload;
+"""
+
+CREATE_JOBS_UPLOAD_TABLE = """
+    CREATE TABLE jobs_upload (
+        id SERIAL PRIMARY KEY,
+        job_title VARCHAR,
+        employer_name VARCHAR,
+        location VARCHAR,
+        hybryd_full_remote VARCHAR,
+        expiration VARCHAR,
+        contract_type VARCHAR,
+        experience_level VARCHAR,
+        salary VARCHAR,
+        technologies TEXT,
+        responsibilities TEXT,
+        requirements TEXT,
+        offering TEXT,
+        benefits TEXT,
+        url VARCHAR,
+        date_posted TIMESTAMP,
+        upload_id VARCHAR
+    );
+"""
+
+CREATE_JOBS_UPLOAD_BACKUP_TABLE = """
+    CREATE TABLE IF NOT EXISTS jobs_upload_backup (
+        id SERIAL PRIMARY KEY,
+        job_title VARCHAR,
+        employer_name VARCHAR,
+        location VARCHAR,
+        hybryd_full_remote VARCHAR,
+        expiration VARCHAR,
+        contract_type VARCHAR,
+        experience_level VARCHAR,
+        salary VARCHAR,
+        technologies TEXT,
+        responsibilities TEXT,
+        requirements TEXT,
+        offering TEXT,
+        benefits TEXT,
+        url VARCHAR,
+        date_posted TIMESTAMP,
+        upload_id VARCHAR
+    );
+    CREATE INDEX IF NOT EXISTS jobs_upload_backup_upload_id_url_idx
+        ON jobs_upload_backup (upload_id, url);
+"""
+
+# Used in the "staging" ingest mode: rows are only written to jobs_upload and
+# the backup is filled server-side when the spider closes. Rows backed up by
+# an interrupted run of the same crawl are not copied again. If the crawl dies
+# and is not resumed before the next pracuj_pl_spider run recreates jobs_upload,
+# its rows never reach the backup; the default 'dual' mode has no such window.
+DERIVE_JOBS_UPLOAD_BACKUP = """
+    INSERT INTO jobs_upload_backup ({columns})
+    SELECT {upload_columns} FROM jobs_upload AS upload
+    WHERE upload.upload_id = {placeholder}
+    AND NOT EXISTS (
+        SELECT 1 FROM jobs_upload_backup AS backup
+        WHERE backup.upload_id = upload.upload_id AND backup.url = upload.url
+    );
+"""
+
+INGEST_MODES = ('dual', 'staging')
+
+CREATE_JOB_FINGERPRINTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS job_fingerprints (
+        fingerprint CHAR(32) PRIMARY KEY,
+        url VARCHAR,
+        first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+# Stored by the database pipelines in the transaction that puts the rows into
+# jobs_upload_backup (the batch copy in 'dual' mode, derive_backup in 'staging'
+# mode), so there are never fingerprints without durable rows behind them
+INSERT_JOB_FINGERPRINTS = """
+    INSERT INTO job_fingerprints (fingerprint, url) VALUES {values} ON CONFLICT DO NOTHING;
+"""
+
+# Fields that identify a posting's content. url, expiration, date_posted and
+# upload_id change when the same offer is re-posted, so they are left out.
+FINGERPRINT_FIELDS = (
+    'job_title', 'employer_name', 'location', 'hybryd_full_remote', 'contract_type',
+    'experience_level', 'salary', 'technologies', 'responsibilities', 'requirements',
+    'offering', 'benefits'
+)
+
+
+def pg_array_literal(values):
+    """Render a list the way PostgreSQL prints a text[] value, e.g. {Junior,"Mid Level"}."""
+    elements = []
+    for value in values:
+        if value is None:
+            elements.append('NULL')
+            continue
+        value = str(value)
+        if value == '' or value.upper() == 'NULL' or any(c in value for c in '{},"\\ \t\n\r'):
+            value = '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+        elements.append(value)
+    return '{' + ','.join(elements) + '}'
+
+
+def copy_value(value):
+    """Escape a single value for COPY ... FROM STDIN in text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, (list, tuple)):
+        value = pg_array_literal(value)
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def copy_rows(cursor, table, rows):
+    """COPY rows of copy_value() strings, ordered as JOBS_UPLOAD_COLUMNS, into a table."""
+    data = '\n'.join('\t'.join(row) for row in rows) + '\n'
+    columns = ', '.join(JOBS_UPLOAD_COLUMNS)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", io.StringIO(data))
+
+
+def record_value(column, value):
+    """Convert an item value to the Python type asyncpg expects for its jobs_upload column."""
+    if value is None:
+        return None
+    if column == 'date_posted':
+        if isinstance(value, datetime.datetime):
+            return value
+        if isinstance(value, datetime.date):
+            return datetime.datetime.combine(value, datetime.time())
+        return datetime.datetime.fromisoformat(str(value))
+    if isinstance(value, (list, tuple)):
+        return pg_array_literal(value)
+    return str(value)
+
+
+def ingest_tables(ingest_mode):
+    """Tables each batch is copied into for the given POSTGRES_INGEST_MODE."""
+    if ingest_mode not in INGEST_MODES:
+        raise ValueError(f"POSTGRES_INGEST_MODE must be one of {INGEST_MODES}, got {ingest_mode!r}")
+    if ingest_mode == 'staging':
+        return ('jobs_upload',)
+    return ('jobs_upload', 'jobs_upload_backup')
+
+
+def derive_backup_query(placeholder):
+    return DERIVE_JOBS_UPLOAD_BACKUP.format(
+        columns=', '.join(JOBS_UPLOAD_COLUMNS),
+        upload_columns=', '.join(f'upload.{column}' for column in JOBS_UPLOAD_COLUMNS),
+        placeholder=placeholder,
+    )
+
+
+def item_values(item, fields):
+    """Values of the given fields, read straight from JobPosting slots or through ItemAdapter for other item types."""
+    if isinstance(item, JobPosting):
+        return [getattr(item, field) for field in fields]
+    adapter = ItemAdapter(item)
+    return [adapter.get(field) for field in fields]
+
+
+def normalize_fingerprint_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return '\x1e'.join(sorted(normalize_fingerprint_value(v) for v in value))
+    return ' '.join(str(value).split()).lower()
+
+
+def item_fingerprint(item):
+    """Stable hex digest of an item's normalized content fields."""
+    content = '\x1f'.join(normalize_fingerprint_value(value) for value in item_values(item, FINGERPRINT_FIELDS))
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def report_flush(spider, stats, row_count, latency):
+    stats.inc_value('pipeline/flushes')
+    stats.inc_value('pipeline/rows_flushed', row_count)
+    stats.inc_value('pipeline/flush_time_total', latency)
+    stats.max_value('pipeline/flush_time_max', latency)
+    spider.logger.info(f"Flushed {row_count} items in {latency:.3f}s")
+
 
 class PostgreSQLPipeline:
+    def __init__(self, persist_fingerprints=False):
+        self.persist_fingerprints = persist_fingerprints
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(persist_fingerprints=crawler.settings.getbool('DEDUP_PERSIST', True))
+
     def open_spider(self, spider):
-        db_config = json.loads(os.getenv('DB_CONFIG'))
-        
-        self.connection = psycopg2.connect(
-            dbname=db_config['database'],
-            user=db_config['user'],
-            password=db_config['password'],
-            host=db_config['host']
-        )
+        self.connection = connect()
         self.cursor = self.connection.cursor()
 
-        if spider.name == "pracuj_pl_spider":
+        if spider.name == "pracuj_pl_spider" and not getattr(spider, 'resumed', False):
             try:
-                self.cursor.execute("""
-                    DROP TABLE IF EXISTS jobs_upload;
-                """)
-                self.cursor.execute("""
-                    CREATE TABLE jobs_upload (
-                        id SERIAL PRIMARY KEY,
-                        job_title VARCHAR,
-                        employer_name VARCHAR,
-                        location VARCHAR,
-                        hybryd_full_remote VARCHAR,
-                        expiration VARCHAR,
-                        contract_type VARCHAR,
-                        experience_level VARCHAR,
-                        salary VARCHAR,
-                        technologies TEXT,
-                        responsibilities TEXT,
-                        requirements TEXT,
-                        offering TEXT,
-                        benefits TEXT,
-                        url VARCHAR,
-                        date_posted TIMESTAMP,
-                        upload_id VARCHAR
-                    );
-                """)
-
-                self.cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS jobs_upload_backup (
-                        id SERIAL PRIMARY KEY,
-                        job_title VARCHAR,
-                        employer_name VARCHAR,
-                        location VARCHAR,
-                        hybryd_full_remote VARCHAR,
-                        expiration VARCHAR,
-                        contract_type VARCHAR,
-                        experience_level VARCHAR,
-                        salary VARCHAR,
-                        technologies TEXT,
-                        responsibilities TEXT,
-                        requirements TEXT,
-                        offering TEXT,
-                        benefits TEXT,
-                        url VARCHAR,
-                        date_posted TIMESTAMP,
-                        upload_id VARCHAR
-                    );
-                """)
+                self.cursor.execute(DROP_JOBS_UPLOAD_TABLE)
+                self.cursor.execute(CREATE_JOBS_UPLOAD_TABLE)
+                self.cursor.execute(CREATE_JOBS_UPLOAD_BACKUP_TABLE)
 
                 self.connection.commit()
             except Exception as e:
                 print(f"Error setting up the database table: {e}")
                 self.connection.rollback()
 
+        if self.persist_fingerprints:
+            try:
+                self.cursor.execute(CREATE_JOB_FINGERPRINTS_TABLE)
+                self.connection.commit()
+            except Exception as e:
+                print(f"Error setting up the job_fingerprints table: {e}")
+                self.connection.rollback()
+
     def close_spider(self, spider):
         try:
             self.connection.commit()
@@ -83,6 +251,8 @@ class PostgreSQLPipeline:
 
     # Add 'spider' argument here
     def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        fingerprint = item_fingerprint(item)
         try:
             # Insert into the main table
             self.cursor.execute("""
@@ -92,22 +262,22 @@ class PostgreSQLPipeline:
                     offering, benefits, url, date_posted, upload_id
                 ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """, (
-                item.get('job_title'),
-                item.get('employer_name'),
-                item.get('location'),
-                item.get('hybryd_full_remote'),
-                item.get('expiration'),
-                item.get('contract_type'),
-                item.get('experience_level'),
-                item.get('salary'),
-                item.get('technologies'),
-                item.get('responsibilities'),
-                item.get('requirements'),
-                item.get('offering'),
-                item.get('benefits'),
-                item.get('url'),
-                item.get('date_posted'),
-                item.get('upload_id')
+                adapter.get('job_title'),
+                adapter.get('employer_name'),
+                adapter.get('location'),
+                adapter.get('hybryd_full_remote'),
+                adapter.get('expiration'),
+                adapter.get('contract_type'),
+                adapter.get('experience_level'),
+                adapter.get('salary'),
+                adapter.get('technologies'),
+                adapter.get('responsibilities'),
+                adapter.get('requirements'),
+                adapter.get('offering'),
+                adapter.get('benefits'),
+                adapter.get('url'),
+                adapter.get('date_posted'),
+                adapter.get('upload_id')
             ))
 
             # Insert into the backup table
@@ -118,28 +288,387 @@ class PostgreSQLPipeline:
                     offering, benefits, url, date_posted, upload_id
                 ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """, (
-                item.get('job_title'),
-                item.get('employer_name'),
-                item.get('location'),
-                item.get('hybryd_full_remote'),
-                item.get('expiration'),
-                item.get('contract_type'),
-                item.get('experience_level'),
-                item.get('salary'),
-                item.get('technologies'),
-                item.get('responsibilities'),
-                item.get('requirements'),
-                item.get('offering'),
-                item.get('benefits'),
-                item.get('url'),
-                item.get('date_posted'),
-                item.get('upload_id')
+                adapter.get('job_title'),
+                adapter.get('employer_name'),
+                adapter.get('location'),
+                adapter.get('hybryd_full_remote'),
+                adapter.get('expiration'),
+                adapter.get('contract_type'),
+                adapter.get('experience_level'),
+                adapter.get('salary'),
+                adapter.get('technologies'),
+                adapter.get('responsibilities'),
+                adapter.get('requirements'),
+                adapter.get('offering'),
+                adapter.get('benefits'),
+                adapter.get('url'),
+                adapter.get('date_posted'),
+                adapter.get('upload_id')
             ))
 
+            if self.persist_fingerprints:
+                self.cursor.execute(
+                    INSERT_JOB_FINGERPRINTS.format(values='(%s, %s)'),
+                    (fingerprint, adapter.get('url'))
+                )
+
             self.connection.commit()
 
         except Exception as e:
             print(f"Error inserting item: {e}")
             self.connection.rollback()
+            fingerprints_failed([fingerprint])
+            return item
+
+        fingerprints_written([fingerprint])
+        return item
+
+
+class BatchedPostgreSQLPipeline(PostgreSQLPipeline):
+    """Buffer items in memory and write them with COPY in one transaction per batch.
+
+    A batch is flushed when it reaches POSTGRES_BATCH_SIZE items, when
+    POSTGRES_BATCH_INTERVAL seconds have passed since the last flush, and
+    once more in close_spider. With POSTGRES_INGEST_MODE = 'staging' batches
+    only go to jobs_upload and the backup rows are copied server-side at close.
+    With DEDUP_PERSIST the fingerprints of the batch are stored in the
+    transaction that writes its jobs_upload_backup rows.
+    """
+
+    def __init__(self, stats, batch_size=500, batch_interval=30.0, ingest_mode='dual', persist_fingerprints=False):
+        super().__init__(persist_fingerprints)
+        self.stats = stats
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.ingest_mode = ingest_mode
+        self.tables = ingest_tables(ingest_mode)
+        self.buffer = []
+        self.fingerprints = []
+        self.staged_fingerprints = []
+        self.last_flush = time.monotonic()
+        self.flush_loop = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            crawler.stats,
+            batch_size=crawler.settings.getint('POSTGRES_BATCH_SIZE', 500),
+            batch_interval=crawler.settings.getfloat('POSTGRES_BATCH_INTERVAL', 30.0),
+            ingest_mode=crawler.settings.get('POSTGRES_INGEST_MODE', 'dual'),
+            persist_fingerprints=crawler.settings.getbool('DEDUP_PERSIST', True),
+        )
+
+    def open_spider(self, spider):
+        super().open_spider(spider)
+        self.spider = spider
+        self.flush_loop = task.LoopingCall(self.flush_if_stale)
+        self.flush_loop.start(self.batch_interval, now=False)
+
+    def close_spider(self, spider):
+        if self.flush_loop and self.flush_loop.running:
+            self.flush_loop.stop()
+        self.flush()
+        if self.ingest_mode == 'staging':
+            self.derive_backup(spider)
+        super().close_spider(spider)
+
+    def process_item(self, item, spider):
+        values = item_values(item, JOBS_UPLOAD_COLUMNS)
+        self.buffer.append(tuple(copy_value(value) for value in values))
+        self.fingerprints.append((item_fingerprint(item), values[JOBS_UPLOAD_COLUMNS.index('url')]))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+        return item
+
+    def flush_if_stale(self):
+        if self.buffer and time.monotonic() - self.last_flush >= self.batch_interval:
+            self.flush()
+
+    def flush(self):
+        """Copy the buffered rows into the ingest tables."""
+        self.last_flush = time.monotonic()
+        if not self.buffer:
+            return
+        rows, self.buffer = self.buffer, []
+        fingerprints, self.fingerprints = self.fingerprints, []
+
+        started = time.perf_counter()
+        try:
+            for table in self.tables:
+                copy_rows(self.cursor, table, rows)
+            if self.persist_fingerprints and self.ingest_mode == 'dual':
+                execute_values(self.cursor, INSERT_JOB_FINGERPRINTS.format(values='%s'), fingerprints, page_size=1000)
+            self.connection.commit()
+        except Exception as e:
+            self.spider.logger.error(f"Error copying batch of {len(rows)} items: {e}")
+            self.connection.rollback()
+            self.stats.inc_value('pipeline/failed_rows', len(rows))
+            fingerprints_failed(fingerprint for fingerprint, _ in fingerprints)
+            return
+
+        fingerprints_written(fingerprint for fingerprint, _ in fingerprints)
+        if self.persist_fingerprints and self.ingest_mode == 'staging':
+            self.staged_fingerprints.extend(fingerprints)
+        report_flush(self.spider, self.stats, len(rows), time.perf_counter() - started)
+
+    def derive_backup(self, spider):
+        """Copy this spider's jobs_upload rows into jobs_upload_backup, with the fingerprints of the rows it wrote."""
+        try:
+            self.cursor.execute(derive_backup_query('%s'), (spider.upload_id,))
+            backup_rows = self.cursor.rowcount
+            if self.staged_fingerprints:
+                execute_values(self.cursor, INSERT_JOB_FINGERPRINTS.format(values='%s'), self.staged_fingerprints, page_size=1000)
+            self.connection.commit()
+        except Exception as e:
+            spider.logger.error(f"Error filling jobs_upload_backup: {e}")
+            self.connection.rollback()
+            return
+        self.stats.set_value('pipeline/backup_rows', backup_rows)
+
+
+# Spiders running in the same process (see crawl_all.py) share one asyncpg pool
+_shared_pool = None
+_shared_pool_users = 0
+_shared_pool_lock = asyncio.Lock()
+
+
+async def acquire_shared_pool(max_size):
+    global _shared_pool, _shared_pool_users
+    async with _shared_pool_lock:
+        if _shared_pool is None:
+            db_config = get_db_config()
+            _shared_pool = await asyncpg.create_pool(
+                database=db_config['database'],
+                user=db_config['user'],
+                password=db_config['password'],
+                host=db_config['host'],
+                port=db_config.get('port', 5432),
+                min_size=1,
+                max_size=max_size,
+            )
+        _shared_pool_users += 1
+        return _shared_pool
+
+
+async def release_shared_pool():
+    global _shared_pool, _shared_pool_users
+    async with _shared_pool_lock:
+        _shared_pool_users -= 1
+        if _shared_pool_users == 0:
+            await _shared_pool.close()
+            _shared_pool = None
+
+
+class AsyncPostgreSQLPipeline:
+    """Batched writer on an asyncpg connection pool that never blocks the reactor.
+
+    Full batches are copied in background tasks. Once POSTGRES_MAX_INFLIGHT_WRITES
+    of them are running, process_item waits for one to finish, which holds the
+    item back in the scraper and slows the crawl down to what the database
+    can absorb. POSTGRES_INGEST_MODE and DEDUP_PERSIST work as in
+    BatchedPostgreSQLPipeline.
+    """
+
+    def __init__(self, stats, batch_size=500, batch_interval=30.0, pool_size=4, max_inflight_writes=2,
+                 ingest_mode='dual', persist_fingerprints=False):
+        self.stats = stats
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.ingest_mode = ingest_mode
+        self.tables = ingest_tables(ingest_mode)
+        self.pool_size = pool_size
+        self.max_inflight_writes = max_inflight_writes
+        self.persist_fingerprints = persist_fingerprints
+        self.buffer = []
+        self.fingerprints = []
+        self.staged_fingerprints = []
+        self.writes = set()
+        self.last_flush = time.monotonic()
+        self.flush_loop = None
+        self.pool = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            crawler.stats,
+            batch_size=crawler.settings.getint('POSTGRES_BATCH_SIZE', 500),
+            batch_interval=crawler.settings.getfloat('POSTGRES_BATCH_INTERVAL', 30.0),
+            pool_size=crawler.settings.getint('POSTGRES_POOL_SIZE', 4),
+            max_inflight_writes=crawler.settings.getint('POSTGRES_MAX_INFLIGHT_WRITES', 2),
+            ingest_mode=crawler.settings.get('POSTGRES_INGEST_MODE', 'dual'),
+            persist_fingerprints=crawler.settings.getbool('DEDUP_PERSIST', True),
+        )
+
+    def open_spider(self, spider):
+        self.spider = spider
+        return deferred_from_coro(self._open_spider(spider))
+
+    async def _open_spider(self, spider):
+        self.pool = await acquire_shared_pool(self.pool_size)
+
+        if spider.name == "pracuj_pl_spider" and not getattr(spider, 'resumed', False):
+            try:
+                async with self.pool.acquire() as connection:
+                    async with connection.transaction():
+                        await connection.execute(DROP_JOBS_UPLOAD_TABLE)
+                        await connection.execute(CREATE_JOBS_UPLOAD_TABLE)
+                        await connection.execute(CREATE_JOBS_UPLOAD_BACKUP_TABLE)
+            except Exception as e:
+                spider.logger.error(f"Error setting up the database table: {e}")
+
+        if self.persist_fingerprints:
+            try:
+                async with self.pool.acquire() as connection:
+                    await connection.execute(CREATE_JOB_FINGERPRINTS_TABLE)
+            except Exception as e:
+                spider.logger.error(f"Error setting up the job_fingerprints table: {e}")
+
+        self.flush_loop = task.LoopingCall(self.flush_if_stale)
+        self.flush_loop.start(self.batch_interval, now=False)
+
+    def close_spider(self, spider):
+        if self.flush_loop and self.flush_loop.running:
+            self.flush_loop.stop()
+        return deferred_from_coro(self._close_spider())
+
+    async def _close_spider(self):
+        self.flush()
+        if self.writes:
+            await asyncio.wait(self.writes)
+        if self.ingest_mode == 'staging':
+            await self.derive_backup()
+        if self.pool:
+            await release_shared_pool()
+
+    async def process_item(self, item, spider):
+        values = item_values(item, JOBS_UPLOAD_COLUMNS)
+        self.buffer.append(tuple(record_value(column, value) for column, value in zip(JOBS_UPLOAD_COLUMNS, values)))
+        self.fingerprints.append((item_fingerprint(item), record_value('url', values[JOBS_UPLOAD_COLUMNS.index('url')])))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+        while len(self.writes) >= self.max_inflight_writes:
+            self.stats.inc_value('pipeline/backpressure_waits')
+            await asyncio.wait(self.writes, return_when=asyncio.FIRST_COMPLETED)
+        return item
+
+    def flush_if_stale(self):
+        if self.buffer and time.monotonic() - self.last_flush >= self.batch_interval:
+            self.flush()
+
+    def flush(self):
+        """Start a background copy of the buffered rows."""
+        self.last_flush = time.monotonic()
+        if not self.buffer:
+            return
+        rows, self.buffer = self.buffer, []
+        fingerprints, self.fingerprints = self.fingerprints, []
+
+        write = asyncio.ensure_future(self.write(rows, fingerprints))
+        self.writes.add(write)
+        write.add_done_callback(self.writes.discard)
+        self.stats.max_value('pipeline/inflight_writes_max', len(self.writes))
+
+    async def write(self, rows, fingerprints=()):
+        started = time.perf_counter()
+        try:
+            async with self.pool.acquire() as connection:
+                async with connection.transaction():
+                    for table in self.tables:
+                        await connection.copy_records_to_table(table, records=rows, columns=JOBS_UPLOAD_COLUMNS)
+                    if self.persist_fingerprints and self.ingest_mode == 'dual':
+                        await connection.executemany(INSERT_JOB_FINGERPRINTS.format(values='($1, $2)'), fingerprints)
+        except Exception as e:
+            self.spider.logger.error(f"Error copying batch of {len(rows)} items: {e}")
+            self.stats.inc_value('pipeline/failed_rows', len(rows))
+            fingerprints_failed(fingerprint for fingerprint, _ in fingerprints)
+            return
+
+        fingerprints_written(fingerprint for fingerprint, _ in fingerprints)
+        if self.persist_fingerprints and self.ingest_mode == 'staging':
+            self.staged_fingerprints.extend(fingerprints)
+        report_flush(self.spider, self.stats, len(rows), time.perf_counter() - started)
+
+    async def derive_backup(self):
+        """Copy this spider's jobs_upload rows into jobs_upload_backup, with the fingerprints of the rows it wrote."""
+        try:
+            async with self.pool.acquire() as connection:
+                async with connection.transaction():
+                    status = await connection.execute(derive_backup_query('$1'), self.spider.upload_id)
+                    if self.staged_fingerprints:
+                        await connection.executemany(INSERT_JOB_FINGERPRINTS.format(values='($1, $2)'), self.staged_fingerprints)
+        except Exception as e:
+            self.spider.logger.error(f"Error filling jobs_upload_backup: {e}")
+            return
+        self.stats.set_value('pipeline/backup_rows', int(status.split()[-1]))
+
+
+# Fingerprints loaded from job_fingerprints plus those of rows written in this
+# run, shared by all spiders of a run so a posting re-listed on another board
+# is caught as well. Items let through but not written yet are pending; a
+# failed write takes them out again so later copies of the posting get through.
+_known_fingerprints = None
+_pending_fingerprints = set()
+
+
+def fingerprints_written(fingerprints):
+    """Mark the fingerprints of items whose rows reached the database as known."""
+    fingerprints = set(fingerprints)
+    _pending_fingerprints.difference_update(fingerprints)
+    if _known_fingerprints is not None:
+        _known_fingerprints.update(fingerprints)
+
+
+def fingerprints_failed(fingerprints):
+    """Forget the fingerprints of items whose rows could not be written."""
+    _pending_fingerprints.difference_update(fingerprints)
+
+
+class DuplicateItemPipeline:
+    """Drops items whose content was already seen in this run or a previous one.
+
+    Must run before the database pipelines. Fingerprints of new items are
+    stored in job_fingerprints by the database pipelines once the rows are in
+    jobs_upload_backup, so postings whose rows were lost are not skipped by
+    later runs.
+    """
+
+    def __init__(self, stats, persist=True):
+        self.stats = stats
+        self.persist = persist
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats, persist=crawler.settings.getbool('DEDUP_PERSIST', True))
+
+    def open_spider(self, spider):
+        global _known_fingerprints
+        if _known_fingerprints is not None:
+            return
+        _known_fingerprints = set()
+        if not self.persist:
+            return
+
+        try:
+            connection = connect()
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(CREATE_JOB_FINGERPRINTS_TABLE)
+                    cursor.execute("SELECT fingerprint FROM job_fingerprints;")
+                    _known_fingerprints.update(row[0] for row in cursor)
+                connection.commit()
+            finally:
+                connection.close()
+        except Exception as e:
+            spider.logger.error(f"Error loading job fingerprints: {e}")
+
+        spider.logger.info(f"Loaded {len(_known_fingerprints)} job fingerprints")
+
+    def process_item(self, item, spider):
+        fingerprint = item_fingerprint(item)
+        if fingerprint in _known_fingerprints or fingerprint in _pending_fingerprints:
+            self.stats.inc_value('dedup/duplicates')
+            raise DropItem(f"Duplicate job posting: {ItemAdapter(item).get('url')}")
 
-        return item
\ No newline at end of file
+        _pending_fingerprints.add(fingerprint)
+        self.stats.inc_value('dedup/unique')
+        return item
@@ -0,0 +1,56 @@
+"""Test mode: download every page from the local replay server.
+
+ReplayDownloadHandler sends each request to REPLAY_SERVER_URL instead of
+the live site, with the original host in the Host header, and hands the
+response back under the original URL. Spiders, middlewares and pipelines
+see the same URLs as in a live crawl, so the whole download -> parse ->
+parse path can be measured offline against benchmarks/replay_server.py:
+
+    python -m benchmarks.replay_server --latency 0.2 &
+    python crawl_all.py --replay http://127.0.0.1:8765
+
+A replay must not leave anything behind for the real crawls, so
+replay_settings() also turns off everything that reads or writes the
+database or the crawl state: the database pipelines (only the in-memory
+duplicate filter runs), job_fingerprints, the crawl_runs row, the seen-URL
+filter, JOBDIR, the validator cache and the response archive. Metrics are
+still written as JSON, to .scrapy/replay/crawl_runs.
+"""
+from urllib.parse import urlsplit, urlunsplit
+from scrapy.exceptions import NotConfigured
+from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
+
+REPLAY_HANDLER = 'workscrapper.replay.ReplayDownloadHandler'
+
+
+def replay_settings(server_url):
+    """Settings that route a crawler's downloads to the replay server and keep it off the database and crawl state."""
+    return {
+        'REPLAY_SERVER_URL': server_url,
+        'DOWNLOAD_HANDLERS': {'http': REPLAY_HANDLER, 'https': REPLAY_HANDLER},
+        'ITEM_PIPELINES': {'workscrapper.pipelines.DuplicateItemPipeline': 100},
+        'DEDUP_PERSIST': False,
+        'SEEN_URL_FILTER_ENABLED': False,
+        'CRAWL_METRICS_DB_ENABLED': False,
+        'CRAWL_METRICS_DIR': 'replay/crawl_runs',
+        'HTTP_VALIDATOR_CACHE_ENABLED': False,
+        'RESPONSE_ARCHIVE_ENABLED': False,
+        'JOBDIR': None,
+    }
+
+
+class ReplayDownloadHandler(HTTP11DownloadHandler):
+
+    def __init__(self, settings, crawler=None):
+        if not settings.get('REPLAY_SERVER_URL'):
+            raise NotConfigured('REPLAY_SERVER_URL is not set')
+        super().__init__(settings, crawler)
+        self.server = urlsplit(settings.get('REPLAY_SERVER_URL'))
+
+    def download_request(self, request, spider):
+        parts = urlsplit(request.url)
+        local_request = request.replace(url=urlunsplit((self.server.scheme, self.server.netloc, parts.path or '/', parts.query, '')))
+        local_request.headers['Host'] = parts.netloc
+        deferred = super().download_request(local_request, spider)
+        deferred.addCallback(lambda response: response.replace(url=request.url, request=request))
+        return deferred
@@ -7,17 +7,123 @@ NEWSPIDER_MODULE = "workscrapper.spiders"
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.159 Safari/537.36'
 ROBOTSTXT_OBEY = True
 CONCURRENT_REQUESTS = 20
+# Request budget shared by all spiders when they run together in crawl_all.py, which sets
+# GLOBAL_CONCURRENCY_ENABLED so the downloader hands it out as requests leave their domain slots
+DOWNLOADER = 'workscrapper.downloader.GlobalConcurrencyDownloader'
+GLOBAL_CONCURRENT_REQUESTS = 60
+GLOBAL_CONCURRENCY_ENABLED = False
 
 
 DOWNLOAD_DELAY = 0.5
 CONCURRENT_REQUESTS_PER_DOMAIN = 16
-CONCURRENT_REQUESTS_PER_IP = 16
+CONCURRENT_REQUESTS_PER_IP = 0
 
 ITEM_PIPELINES = {
-    'workscrapper.pipelines.PostgreSQLPipeline': 1,
+    'workscrapper.pipelines.DuplicateItemPipeline': 100,
+    'workscrapper.pipelines.AsyncPostgreSQLPipeline': 300,
 }
 
-AUTOTHROTTLE_ENABLED = True
+# Keep content fingerprints of written postings in job_fingerprints across runs. The database
+# pipelines store them in the transaction that puts the rows into jobs_upload_backup.
+DEDUP_PERSIST = True
+
+# Items are written with COPY once a batch is full or has waited this many seconds
+POSTGRES_BATCH_SIZE = 500
+POSTGRES_BATCH_INTERVAL = 30
+# 'dual' copies every batch into jobs_upload and jobs_upload_backup, 'staging' only into
+# jobs_upload and fills the backup with one INSERT ... SELECT when the spider closes. With
+# 'staging' the rows of a crawl that dies and is not resumed the same day never reach the
+# backup, because the next pracuj_pl_spider run recreates jobs_upload
+POSTGRES_INGEST_MODE = 'dual'
+# asyncpg pool size and the number of batches allowed to be written at the same time
+POSTGRES_POOL_SIZE = 4
+POSTGRES_MAX_INFLIGHT_WRITES = 2
+
+# Upper bound on listing pages per spider; pagination stops earlier once a page has no new jobs
+MAX_LISTING_PAGES = 30
+# Listing pages are scheduled ahead of detail pages, which are ordered newest first;
+# with a budget > 0 only that many detail pages are downloaded per spider, the rest are skipped
+LISTING_REQUEST_PRIORITY = 100
+DETAIL_REQUEST_BUDGET = 0
+
+SPIDER_MIDDLEWARES = {
+    'workscrapper.middlewares.SeenUrlFilterMiddleware': 550,
+    'workscrapper.middlewares.ParseTimingMiddleware': 950,
+}
+
+# Skip detail pages of jobs that are already stored in jobs_upload_backup or jobs
+SEEN_URL_FILTER_ENABLED = True
+
+DOWNLOADER_MIDDLEWARES = {
+    'workscrapper.frontier.FrontierMiddleware': 10,
+    'workscrapper.middlewares.DetailBudgetMiddleware': 50,
+    'workscrapper.middlewares.WorkscrapperDownloaderMiddleware': 580,
+    'workscrapper.middlewares.AdaptiveConcurrencyMiddleware': 950,
+}
+
+# Revalidate job detail pages with ETag/Last-Modified stored in .scrapy/validator_cache.sqlite.
+# Stored jobs are never requested again while SEEN_URL_FILTER_ENABLED is on, so the cache only
+# pays off with the seen filter disabled (e.g. to refresh stored offers) and is off by default
+HTTP_VALIDATOR_CACHE_ENABLED = False
+HTTP_VALIDATOR_CACHE_PATH = 'validator_cache.sqlite'
+HTTP_VALIDATOR_CACHE_EXPIRATION_DAYS = 30
+# Stores are committed in batches of this size and at least every this many seconds
+HTTP_VALIDATOR_CACHE_COMMIT_BATCH = 100
+HTTP_VALIDATOR_CACHE_COMMIT_INTERVAL = 5
+
+EXTENSIONS = {
+    'workscrapper.extensions.ResponseArchiveExtension': 500,
+    'workscrapper.extensions.CrawlMetricsExtension': 500,
+    'workscrapper.extensions.CrawlCheckpointExtension': 500,
+}
+
+# crawl_all.py gives every spider a JOBDIR in .scrapy/<CRAWL_STATE_DIR>/<date>/<spider> so an
+# interrupted nightly crawl resumes when it is started again the same day
+CRAWL_STATE_DIR = 'crawl_state'
+CRAWL_CHECKPOINT_INTERVAL = 60
+
+# Shared Postgres crawl frontier (workscrapper/frontier.py), used when several workers split one
+# crawl: python crawl_all.py --frontier, or -s SCHEDULER=workscrapper.frontier.PostgresFrontierScheduler
+FRONTIER_CLAIM_BATCH = 16
+FRONTIER_CLAIM_TIMEOUT = 600
+FRONTIER_MAX_ATTEMPTS = 3
+FRONTIER_POLL_INTERVAL = 1.0
+
+# Read pracuj.pl detail pages from their embedded __NEXT_DATA__ JSON instead of the HTML. Off
+# until the offer schema in spiders/pracuj_pl.py is verified on live pages
+PRACUJ_NEXT_DATA_ENABLED = False
+
+# Test mode: fetch every page from the local replay server (benchmarks/replay_server.py),
+# enabled with python crawl_all.py --replay URL, see workscrapper/replay.py
+REPLAY_SERVER_URL = None
+
+# Keep raw job detail responses in .scrapy/archive for offline re-parsing (replay_archive.py)
+RESPONSE_ARCHIVE_ENABLED = False
+RESPONSE_ARCHIVE_DIR = 'archive'
+RESPONSE_ARCHIVE_SEGMENT_SIZE = 67108864
+
+# Per-domain concurrency controller, replaces AutoThrottle which only adjusts the delay
+ADAPTIVE_CONCURRENCY_ENABLED = True
+ADAPTIVE_CONCURRENCY_TARGET_LATENCY = 1.0
+ADAPTIVE_CONCURRENCY_MIN = 1
+ADAPTIVE_CONCURRENCY_MAX = 16
+# Slots every domain starts with, CONCURRENT_REQUESTS_PER_DOMAIN // 2 when unset
+ADAPTIVE_CONCURRENCY_START = 8
+# Fast domains may go below DOWNLOAD_DELAY, which only sets the starting delay
+ADAPTIVE_CONCURRENCY_MIN_DELAY = 0
+ADAPTIVE_CONCURRENCY_MAX_DELAY = 10
+ADAPTIVE_CONCURRENCY_MAX_ERROR_RATE = 0.05
+ADAPTIVE_CONCURRENCY_INTERVAL = 5
+
+# Per-run crawl metrics, written to .scrapy/crawl_runs/<upload_id>.json and optionally to crawl_runs
+CRAWL_METRICS_ENABLED = True
+CRAWL_METRICS_DIR = 'crawl_runs'
+CRAWL_METRICS_DB_ENABLED = True
+
+# Longest value kept for a normalized item text field (see workscrapper/normalization.py)
+NORMALIZED_FIELD_MAX_LENGTH = 4000
+
+AUTOTHROTTLE_ENABLED = False
 
 LOG_LEVEL="INFO"
 
@@ -0,0 +1,205 @@
+import re
+import scrapy
+from datetime import date, datetime, timedelta
+
+from workscrapper.extraction import Extractor, public_values
+from workscrapper.items import JobPosting
+from workscrapper.normalization import DEFAULT_MAX_LENGTH, normalize_item
+
+POLISH_MONTHS = {
+    'stycznia': 1, 'lutego': 2, 'marca': 3, 'kwietnia': 4, 'maja': 5, 'czerwca': 6,
+    'lipca': 7, 'sierpnia': 8, 'września': 9, 'października': 10, 'listopada': 11, 'grudnia': 12,
+}
+
+# Detail fields that can be taken from the listing card when the detail page lacks them
+LISTING_FALLBACK_FIELDS = ('job_title', 'employer_name')
+
+
+class JobListingSpider(scrapy.Spider):
+    """Base class for the job portal spiders.
+
+    Listing pages are followed one by one until a page yields no job links
+    that are not already known, the last page reported by the site is
+    reached, or max_listing_pages (MAX_LISTING_PAGES setting or
+    ``-a max_listing_pages=N``) is hit.
+
+    Subclasses describe the pages declaratively (see workscrapper.extraction):
+    listing_fields must provide 'job_links' and may provide 'page_count' and
+    'offers', detail_fields provides the JobsItem fields. Both are compiled
+    once, when the subclass is created.
+
+    Listing pages are requested with LISTING_REQUEST_PRIORITY so discovery
+    runs ahead of the detail pages, which are scored by detail_priority:
+    newest postings first. 'offers' is a Nested
+    field reading the cheap fields of every offer card (url, job_title,
+    employer_name, posted); they feed the score and fill in detail fields
+    the detail page is missing.
+    """
+
+    base_url = None
+    max_listing_pages = None
+    upload_id = None
+    # Set by CrawlCheckpointExtension when the spider continues an interrupted crawl
+    resumed = False
+    # JobPosting (slotted dataclass) or JobsItem, both are built from keyword arguments
+    item_class = JobPosting
+
+    listing_fields = None
+    detail_fields = None
+    listing_extractor = None
+    detail_extractor = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.__dict__.get('listing_fields') is not None:
+            cls.listing_extractor = Extractor(cls.listing_fields)
+        if cls.__dict__.get('detail_fields') is not None:
+            cls.detail_extractor = Extractor(cls.detail_fields)
+
+    def start_requests(self):
+        yield scrapy.Request(url=self.page_url(1), callback=self.parse, priority=self.listing_priority(), meta={'page': 1})
+
+    def page_url(self, page):
+        return f"{self.base_url}{page}"
+
+    def extract_job_links(self, response):
+        return self.listing_extractor.extract_field('job_links', response)
+
+    def extract_page_count(self, response):
+        """Return the number of listing pages if the site shows it, otherwise None."""
+        if 'page_count' not in self.listing_extractor.fields:
+            return None
+        return self.listing_extractor.extract_field('page_count', response)
+
+    def extract_offers(self, response):
+        """Return a dict per job link of a listing page, with the fields its offer card shows."""
+        cards = {}
+        if 'offers' in self.listing_extractor.fields:
+            for card in self.listing_extractor.extract_field('offers', response):
+                if card.get('url'):
+                    cards[response.urljoin(card['url'])] = card
+        return [dict(cards.get(job_link, {}), url=job_link) for job_link in self.extract_job_links(response)]
+
+    def extract_details(self, response):
+        """Return the JobsItem fields of a detail page."""
+        return public_values(self.detail_extractor.extract(response))
+
+    def listing_priority(self):
+        return self.settings.getint('LISTING_REQUEST_PRIORITY', 100)
+
+    def detail_priority(self, offer, page):
+        """Scrapy downloads higher priorities first: newer postings score higher.
+
+        The age comes from the card's posting date, or from the listing page
+        number when the card has none, as listings are sorted newest first.
+        """
+        posted = offer.get('posted')
+        age_days = max((date.today() - posted).days, 0) if posted else page - 1
+        return -100 * age_days - page
+
+    def parse_job_details(self, response):
+        fields = self.extract_details(response)
+        listing = response.meta.get('listing') or {}
+        for field in LISTING_FALLBACK_FIELDS:
+            if fields.get(field) in (None, 'N/A') and listing.get(field):
+                fields[field] = listing[field]
+                self.inc_stat('listing/fields_filled')
+
+        item = self.item_class(
+            **fields,
+            url=str(response.url),
+            date_posted=(datetime.today() - timedelta(days=1)).date(),
+            upload_id=self.upload_id
+        )
+        yield self.normalize_item(item)
+
+    def normalize_item(self, item):
+        """Normalize the item's text fields (see workscrapper.normalization) before it is yielded."""
+        crawler = getattr(self, 'crawler', None)
+        max_length = crawler.settings.getint('NORMALIZED_FIELD_MAX_LENGTH', DEFAULT_MAX_LENGTH) if crawler else DEFAULT_MAX_LENGTH
+        self.inc_stat('normalization/bytes_saved', normalize_item(item, max_length))
+        return item
+
+    def inc_stat(self, key, count=1):
+        """Increment a crawl stat; a no-op when the spider runs without a crawler (benchmarks, replay)."""
+        crawler = getattr(self, 'crawler', None)
+        if crawler:
+            crawler.stats.inc_value(key, count, spider=self)
+
+    def page_limit(self):
+        if self.max_listing_pages is not None:
+            return int(self.max_listing_pages)
+        return self.settings.getint('MAX_LISTING_PAGES', 30)
+
+    def parse(self, response):
+        page = response.meta.get('page', 1)
+        # Pagination widgets may only show a window of page numbers around the
+        # current page, so the count is read again on every page
+        page_counts = [count for count in (self.extract_page_count(response), response.meta.get('page_count')) if count]
+        page_count = max(page_counts) if page_counts else None
+        self.crawler.stats.inc_value('pagination/pages', spider=self)
+
+        offers = self.extract_offers(response)
+        seen_urls = getattr(self, 'seen_urls', None)
+        new_links = [offer['url'] for offer in offers if seen_urls is None or offer['url'] not in seen_urls]
+        self.inc_stat('listing/offers', len(offers))
+
+        for offer in offers:
+            yield scrapy.Request(
+                url=offer['url'],
+                callback=self.parse_job_details,
+                priority=self.detail_priority(offer, page),
+                meta={'listing': offer}
+            )
+
+        if not new_links:
+            stop_reason = 'no_new_links'
+        elif page_count is not None and page >= page_count:
+            stop_reason = 'last_page'
+        elif page >= self.page_limit():
+            stop_reason = 'page_limit'
+        else:
+            yield scrapy.Request(
+                url=self.page_url(page + 1),
+                callback=self.parse,
+                priority=self.listing_priority(),
+                meta={'page': page + 1, 'page_count': page_count}
+            )
+            return
+
+        self.crawler.stats.set_value('pagination/stop_reason', stop_reason, spider=self)
+        self.logger.info(f"Stopped pagination after page {page}: {stop_reason}")
+
+
+def max_page_number(values):
+    """Pick the largest page number out of pagination texts or links."""
+    numbers = [int(number) for value in values for number in re.findall(r'\d+', value or '')]
+    return max(numbers) if numbers else None
+
+
+def parse_posted_date(text, today=None):
+    """Read the posting date shown on an offer card, e.g. 'Opublikowana: 17 października 2026',
+    '17.10.2026', 'wczoraj' or '3 dni temu'. Returns None when it cannot be read."""
+    if not text:
+        return None
+    today = today or date.today()
+    text = text.lower()
+
+    if 'dzisiaj' in text or 'today' in text:
+        return today
+    if 'wczoraj' in text or 'yesterday' in text:
+        return today - timedelta(days=1)
+    match = re.search(r'(\d+)\s*(?:dni|dzień|days?)\s*(?:temu|ago)', text)
+    if match:
+        return today - timedelta(days=int(match.group(1)))
+
+    try:
+        match = re.search(r'(\d{1,2})\.(\d{1,2})\.(\d{4})', text)
+        if match:
+            return date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+        match = re.search(r'(\d{1,2})\s+(\w+)\s+(\d{4})', text)
+        if match and match.group(2) in POLISH_MONTHS:
+            return date(int(match.group(3)), POLISH_MONTHS[match.group(2)], int(match.group(1)))
+    except ValueError:
+        pass
+    return None
@@ -1,76 +1,165 @@
-import scrapy
 from datetime import datetime, timedelta
-from workscrapper.items import JobsItem
+from zoneinfo import ZoneInfo
+from workscrapper.extraction import EMPTY_VALUE, Derived, Field, Nested, join_stripped, strip
+from workscrapper.next_data import dehydrated_queries, extract_next_data
+from workscrapper.spiders.base import JobListingSpider, max_page_number, parse_posted_date
 
-class JobSpider(scrapy.Spider):
+CURRENCY_SYMBOLS = {'PLN': 'zł'}
+PORTAL_TIMEZONE = ZoneInfo('Europe/Warsaw')
+MISSING_SALARY = 'N/A N/A N/A'
+
+
+# The offer schema below (attributes.jobTitle, employment.typesOfContracts with
+# their salary, sections/sectionType/subSections) was modelled on the synthetic
+# fixture pages and has not been checked against a live pracuj.pl page yet. Pages it
+# does not match fall back to the CSS spec, and so does every field the blob
+# leaves empty. Until the schema is verified on live markup the fast path is
+# off (PRACUJ_NEXT_DATA_ENABLED).
+
+
+def find_offer(next_data):
+    """Return the offer object from the page's __NEXT_DATA__ state, or None."""
+    for data in dehydrated_queries(next_data):
+        if isinstance(data, dict) and (data.get('attributes') or {}).get('jobTitle'):
+            return data
+    return None
+
+
+def names(entries):
+    """Names joined the way the offer badge shows them, e.g. 'umowa o pracę, kontrakt B2B'."""
+    return ', '.join(entry['name'] for entry in entries or [] if entry.get('name'))
+
+
+def section_texts(sections, section_type, subsection_type=None):
+    """Bullets and item names of a text section, optionally of one sub-section only."""
+    texts = []
+    for section in sections or []:
+        if section.get('sectionType') != section_type:
+            continue
+        parts = [section] + (section.get('subSections') or [])
+        if subsection_type is not None:
+            parts = [part for part in parts if part.get('sectionType') == subsection_type]
+        for part in parts:
+            model = part.get('model') or {}
+            texts += [bullet for bullet in model.get('bullets') or [] if isinstance(bullet, str)]
+            texts += [entry['name'] for entry in (model.get('items') or []) + (model.get('customItems') or []) if entry.get('name')]
+    return texts
+
+
+def format_amount(value):
+    return f"{value:,.0f}".replace(',', ' ')
+
+
+def format_salary(contracts):
+    """Render the first contract salary the way the offer page shows it, e.g. '12 000–18 000 zł brutto / mies.'."""
+    for contract in contracts or []:
+        salary = contract.get('salary')
+        if not salary or salary.get('from') is None:
+            continue
+        amount = format_amount(salary['from'])
+        if salary.get('to') is not None:
+            amount += '–' + format_amount(salary['to'])
+        currency = (salary.get('currency') or {}).get('code')
+        kind = (salary.get('kind') or {}).get('name')
+        unit = ((salary.get('timeUnit') or {}).get('longForm') or {}).get('name')
+        parts = [amount, CURRENCY_SYMBOLS.get(currency, currency), ' / '.join(part for part in (kind, unit) if part)]
+        return ' '.join(part for part in parts if part)
+    return MISSING_SALARY
+
+
+def format_expiration(value):
+    """ISO timestamp to the dd.mm.yyyy form job_data_processing.convert_to_date reads, as a Warsaw date."""
+    try:
+        expiration = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if expiration.tzinfo is not None:
+        expiration = expiration.astimezone(PORTAL_TIMEZONE)
+    return expiration.strftime('%d.%m.%Y')
+
+
+def offer_fields(offer):
+    """Map a pracuj.pl offer object to JobsItem fields."""
+    attributes = offer.get('attributes') or {}
+    employment = attributes.get('employment') or {}
+    workplaces = attributes.get('workplaces') or [{}]
+    sections = offer.get('sections')
+
+    fields = {
+        'job_title': attributes.get('jobTitle'),
+        'employer_name': attributes.get('displayEmployerName'),
+        'location': workplaces[0].get('displayAddress'),
+        'expiration': format_expiration(offer.get('expirationDate')),
+        'contract_type': names(employment.get('typesOfContracts')),
+        'experience_level': names(employment.get('positionLevels')),
+        'hybryd_full_remote': names(employment.get('workModes')),
+        'salary': format_salary(employment.get('typesOfContracts')),
+        'technologies': ';'.join(section_texts(sections, 'technologies', 'technologies-expected')),
+        'responsibilities': ';'.join(section_texts(sections, 'responsibilities')),
+        'requirements': ';'.join(section_texts(sections, 'requirements')),
+        'offering': ';'.join(section_texts(sections, 'offered')),
+        'benefits': ';'.join(section_texts(sections, 'benefits')),
+    }
+    return {field: value.strip() if value else EMPTY_VALUE for field, value in fields.items()}
+
+class JobSpider(JobListingSpider):
     name = "pracuj_pl_spider"
     
-    start_url_number = 1
     base_url = "https://it.pracuj.pl/praca?pn="
     upload_id = str(datetime.today() - timedelta(days=1)) + "_" + "pracuj_pl_spider"
-    
-    def start_requests(self):
-        while self.start_url_number <= 3:
-            start_url = f"{self.base_url}{self.start_url_number}"
-            yield scrapy.Request(url=start_url, callback=self.parse)
-            self.start_url_number += 1
-
-    def parse(self, response):
-        job_links = response.css('a.tiles_c8yvgfl.core_n194fgoq::attr(href)').getall()
-        
-        for job_link in job_links:
-            yield scrapy.Request(url=job_link, callback=self.parse_job_details)
-
-    def parse_job_details(self, response):
-        item = JobsItem()
-        item['job_title'] = response.css('h1[data-test="text-positionName"]::text').get() or 'N/A'
-        item['employer_name'] = response.css('h2[data-test="text-employerName"]::text').get() or 'N/A'
-        item['location'] = response.css('div[data-test="offer-badge-description"]::text').get() or 'N/A'
-        item['expiration'] = response.css('li[data-test="sections-benefit-expiration"] div[data-test="offer-badge-description"]::text').get() or 'N/A'
-        item['contract_type'] = response.css('li[data-test="sections-benefit-contracts"] div[data-test="offer-badge-title"]::text').get() or 'N/A'
-        item['experience_level'] = response.css('li[data-test="sections-benefit-employment-type-name"] div[data-test="offer-badge-title"]::text').get() or 'N/A'    
-        item['hybryd_full_remote'] = response.css('li[data-scroll-id="work-modes"] div[data-test="offer-badge-title"]::text').get() or 'N/A'
-
-
-        salary_range = response.css('div[data-test="text-earningAmount"]::text').get()
-        salary_range = salary_range.strip() if salary_range else 'N/A'
-        
-        salary_currency = response.css('div[data-test="text-earningAmount"] + div.c1d58j13::text').get()
-        salary_currency = salary_currency.strip() if salary_currency else 'N/A'
-        
-        salary_type = response.css('div[data-test="text-earningAmount"] + div.sxxv7b6::text').get()
-        salary_type = salary_type.strip() if salary_type else 'N/A'
-        
-        item['salary'] = f"{salary_range} {salary_currency} {salary_type}".strip()
-        
-        item['technologies'] = ';'.join([
-            tech.strip()
-            for tech in response.css('section[data-test="section-technologies"] ul[data-test="aggregate-open-dictionary-model"] li[data-test="item-technologies-expected"] p::text').getall()
-        ]) or 'N/A'
-        
-        item['responsibilities'] = ';'.join([
-            resp.strip()
-            for resp in response.css('section[data-test="section-responsibilities"] li.tkzmjn3::text').getall()
-        ]) or 'N/A'
-
-        item['requirements'] = ';'.join([
-            resp.strip()
-            for resp in response.css('section[data-test="section-requirements"] li.tkzmjn3::text').getall()
-        ]) or 'N/A'
-
-        item['offering'] = ';'.join([
-            resp.strip()
-            for resp in response.css('section[data-test="section-offered"] li.tkzmjn3::text').getall()
-        ]) or 'N/A'
-
-        item['benefits'] = ';'.join([
-            benefit.strip()
-            for benefit in response.css('ul[data-test="list-benefits"] div[data-test="text-benefit-title"]::text').getall()
-        ]) or 'N/A'
-        
-        item['url'] = str(response.url)
-        item['date_posted'] = (datetime.today() - timedelta(days=1)).date()
-        item['upload_id'] = self.upload_id
-        
-        yield item
-    
\ No newline at end of file
+
+    listing_fields = {
+        'job_links': Field('a.tiles_c8yvgfl.core_n194fgoq::attr(href)', many=True, default=[]),
+        'page_count': Field('span[data-test="top-pagination-max-page-number"]::text', many=True, process=max_page_number, default=None),
+        'offers': Nested('div[data-test="default-offer"]', {
+            'url': Field('a.tiles_c8yvgfl.core_n194fgoq::attr(href)', default=None),
+            'job_title': Field(('h2[data-test="offer-title"] a::text', 'h2[data-test="offer-title"]::text'), process=strip, default=None),
+            'employer_name': Field('h3[data-test="text-company-name"]::text', process=strip, default=None),
+            'posted': Field('p[data-test="text-added"]::text', process=parse_posted_date, default=None),
+        }),
+    }
+
+    detail_fields = {
+        'job_title': Field('h1[data-test="text-positionName"]::text'),
+        'employer_name': Field('h2[data-test="text-employerName"]::text'),
+        'location': Field('div[data-test="offer-badge-description"]::text'),
+        'expiration': Field('li[data-test="sections-benefit-expiration"] div[data-test="offer-badge-description"]::text'),
+        'contract_type': Field('li[data-test="sections-benefit-contracts"] div[data-test="offer-badge-title"]::text'),
+        'experience_level': Field('li[data-test="sections-benefit-employment-type-name"] div[data-test="offer-badge-title"]::text'),
+        'hybryd_full_remote': Field('li[data-scroll-id="work-modes"] div[data-test="offer-badge-title"]::text'),
+
+        '_salary_range': Field('div[data-test="text-earningAmount"]::text', process=strip),
+        '_salary_currency': Field('div[data-test="text-earningAmount"] + div.c1d58j13::text', process=strip),
+        '_salary_type': Field('div[data-test="text-earningAmount"] + div.sxxv7b6::text', process=strip),
+        'salary': Derived(lambda values: f"{values['_salary_range']} {values['_salary_currency']} {values['_salary_type']}".strip()),
+
+        'technologies': Field(
+            'section[data-test="section-technologies"] ul[data-test="aggregate-open-dictionary-model"] li[data-test="item-technologies-expected"] p::text',
+            many=True, process=join_stripped()
+        ),
+        'responsibilities': Field('section[data-test="section-responsibilities"] li.tkzmjn3::text', many=True, process=join_stripped()),
+        'requirements': Field('section[data-test="section-requirements"] li.tkzmjn3::text', many=True, process=join_stripped()),
+        'offering': Field('section[data-test="section-offered"] li.tkzmjn3::text', many=True, process=join_stripped()),
+        'benefits': Field('ul[data-test="list-benefits"] div[data-test="text-benefit-title"]::text', many=True, process=join_stripped()),
+    }
+
+    def next_data_enabled(self):
+        crawler = getattr(self, 'crawler', None)
+        return crawler is not None and crawler.settings.getbool('PRACUJ_NEXT_DATA_ENABLED')
+
+    def extract_details(self, response):
+        """Read the offer from the embedded __NEXT_DATA__ JSON when enabled, taking missing fields from the CSS spec."""
+        offer = find_offer(extract_next_data(response.body)) if self.next_data_enabled() else None
+        if offer is None:
+            self.inc_stat('extraction/css_fallback')
+            return super().extract_details(response)
+        self.inc_stat('extraction/next_data')
+        fields = offer_fields(offer)
+        missing = [field for field, value in fields.items() if value in (EMPTY_VALUE, MISSING_SALARY)]
+        if missing:
+            css_fields = super().extract_details(response)
+            for field in missing:
+                if css_fields.get(field) not in (None, EMPTY_VALUE, MISSING_SALARY):
+                    fields[field] = css_fields[field]
+                    self.inc_stat('extraction/css_fields_filled')
+        return fields